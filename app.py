@@ -1,10 +1,15 @@
 from flask import Flask, render_template, request, jsonify, Response, session
-import pandas as pd
 import numpy as np
 import random
 import os
 import time
 import json
+import threading
+
+import lexicon_cache
+import lexicon_sources
+from lexicon_artifacts import DerivedArtifacts
+from lexicon_loader import LexiconLoader
 
 # Import jellyfish for string comparisons
 try:
@@ -81,106 +86,23 @@ def add_random_stress(word, part_of_speech="All"):
     
     return ''.join(sylls)
 
-class GreekPseudowordGenerator:
+class GreekPseudowordGenerator(LexiconLoader, DerivedArtifacts):
     # Include your entire GreekPseudowordGenerator class here
     # This is the class from the previous fixes with the balanced syllable sampling
     
     def __init__(self):
-        self.lexicons = {}
-        self.combined_lex = set()
+        super().__init__()
         # Define function to remove oxia
         try:
             self.remove_oxia = remove_diacritic("\u0301")
         except NameError:
             # Fallback if greek_accentuation isn't available
             self.remove_oxia = lambda s: s
-        
-    def load_lexicons(self, greeklex_path, all_num_clean_path=None):
-        """Load lexicons from files"""
-        # Load first lexicon
+        # Syllabifier of this entry point, used by syllabified_lexicon
         try:
-            print(f"Loading primary lexicon from {greeklex_path}...")
-            self.lexicons["greeklex"] = pd.read_excel(greeklex_path)
-            # Convert Word column to string to avoid type issues
-            self.lexicons["greeklex"]["Word"] = self.lexicons["greeklex"]["Word"].astype(str)
-            self.lexicons["greeklex"]["Word"] = self.lexicons["greeklex"]["Word"].apply(self.remove_oxia)
-            
-            # Initialize combined lexicon with first lexicon
-            self.combined_lex = set(self.lexicons["greeklex"]["Word"].values)
-            
-            # Load second lexicon if provided
-            if all_num_clean_path:
-                print(f"Loading secondary lexicon from {all_num_clean_path}...")
-                try:
-                    excel_file = pd.ExcelFile(all_num_clean_path)
-                    dfs = []
-                    for sheet_name in excel_file.sheet_names:
-                        dftemp = excel_file.parse(sheet_name)
-                        dfs.append(dftemp)
-                    self.lexicons["all_num_clean"] = pd.concat(dfs, ignore_index=True)
-                    
-                    # Check if 'spel' column exists in second lexicon
-                    if 'spel' in self.lexicons["all_num_clean"].columns:
-                        # Ensure values are strings
-                        self.lexicons["all_num_clean"]["spel"] = self.lexicons["all_num_clean"]["spel"].astype(str)
-                        # Add to combined lexicon
-                        self.combined_lex.update(set(self.lexicons["all_num_clean"]["spel"].values))
-                    else:
-                        print("Warning: 'spel' column not found in second lexicon.")
-                        # List columns found in the second lexicon
-                        print(f"Columns found: {list(self.lexicons['all_num_clean'].columns)}")
-                except Exception as e:
-                    print(f"Warning: Could not fully process second lexicon: {e}")
-            
-            return self.get_available_pos()
-        except Exception as e:
-            print(f"Error loading lexicons: {e}")
-            raise
-        
-    def get_available_pos(self):
-        """Return available parts of speech in the lexicon"""
-        return np.unique(self.lexicons["greeklex"].Pos.values).tolist()
-    
-    def phonetic_string(self, input_string):
-        """Convert string to phonetic representation"""
-        if not isinstance(input_string, str):
-            input_string = str(input_string)
-            
-        substitutions = {
-            "αι": "ε",
-            "ει": "ι",
-            "οι": "ι",
-            "υι": "ι",
-            "ω": "ο",
-            "η": "ι",
-            "υ": "ι"
-        }
-        output_string = input_string
-        for pattern, replacement in substitutions.items():
-            output_string = output_string.replace(pattern, replacement)
-        return output_string
-    
-    def max_consecutively_repeated_letters(self, string):
-        """Count maximum consecutively repeated letters"""
-        if not isinstance(string, str):
-            string = str(string)
-            
-        max_count = 0
-        current_count = 0
-        previous_letter = None
-
-        for letter in string:
-            if letter.isalpha():
-                letter = letter.lower()
-                if letter == previous_letter:
-                    current_count += 1
-                else:
-                    current_count = 1
-                    previous_letter = letter
-
-                if current_count > max_count:
-                    max_count = current_count
-        return max_count
+            self.syllabify = syllabify
+        except NameError:
+            self.syllabify = None
     
     def calculate_similarity(self, string1, string2):
         """Calculate similarity between two strings"""
@@ -194,66 +116,22 @@ class GreekPseudowordGenerator:
         similarity_ratio = 1 - (levenshtein_distance / max(len(string1), len(string2)))
         return similarity_ratio
     
-    def generate_ngrams(self, text):
-        """Generate n-grams from text"""
-        if not isinstance(text, str):
-            text = str(text)
-            
-        ngrams_2 = [text[i:i+2] for i in range(len(text)-1)]
-        ngrams_3 = [text[i:i+3] for i in range(len(text)-2)]
-        return ngrams_2, ngrams_3
-    
-    def search_ngrams_in_lexicon(self, ngrams_2, ngrams_3):
-        """Search n-grams in lexicon"""
-        for ngram in ngrams_2 + ngrams_3:
-            found = False
-            for word in self.combined_lex:
-                if ngram in word:
-                    found = True
-                    break
-            if not found:
-                return False
-        return True
-    
-    def accept_reject_tests(self, string1, simthreshold=0.5):
-        """Apply tests to accept or reject pseudowords"""
-        # Ensure input is a string
-        if not isinstance(string1, str):
-            string1 = str(string1)
-            
-        # Test 1: Reject if the word exists in the lexicon
-        if string1 in self.combined_lex:
-            return False
-        
-        # Test 2: Reject if there are consecutively repeated letters
-        if self.max_consecutively_repeated_letters(string1) > 1:
-            return False
-        
-        # Test 3: Check similarity and phonetic_similarity
-        # For performance, sample a subset of the lexicon
-        lexicon_sample = random.sample(list(self.combined_lex), min(1000, len(self.combined_lex)))
-        for string2 in lexicon_sample:
-            similarity_ratio = self.calculate_similarity(string1, string2)
-            phonetic_similarity_ratio = self.calculate_similarity(
-                self.phonetic_string(string1), self.phonetic_string(string2))
-            check_ratio = max(similarity_ratio, phonetic_similarity_ratio)
-            if check_ratio > simthreshold:
-                return False
-                
-        # Test 4: Check if all n-grams exist in the lexicon
-        ngrams_2, ngrams_3 = self.generate_ngrams(string1)
-        test = self.search_ngrams_in_lexicon(ngrams_2, ngrams_3)
-        if not test:
-            return False
-
-        return True
-
-    def get_balanced_syllable_samples(self, syldict, num_samples=100):
+    def get_balanced_syllable_samples(self, syldict, num_samples=100, junctions=None):
         """
         Create a balanced sample of syllable combinations to ensure variety in first syllables
+        
+        With junctions (see junction_matrices) each next syllable is drawn only from
+        those that may legally follow the previous one.
         """
         balanced_samples = []
         
+        # Legal followers of each syllable, worked out once per syllable
+        followers = {}
+        def legal_next(pair, index):
+            if (pair, index) not in followers:
+                followers[(pair, index)] = np.flatnonzero(junctions[pair][index]).tolist()
+            return followers[(pair, index)]
+        
         # Get unique first syllables
         first_syllables = list(syldict[1])
         
@@ -265,7 +143,7 @@ class GreekPseudowordGenerator:
         samples_per_first_syllable = max(1, num_samples // len(first_syllables))
         
         # For each first syllable, create some combinations
-        for first_syl in first_syllables:
+        for first_index, first_syl in enumerate(first_syllables):
             # Create list of syllables with this specific first syllable
             syllable_list = [[first_syl]]
             
@@ -276,8 +154,20 @@ class GreekPseudowordGenerator:
             # Generate some combinations with this first syllable
             for _ in range(samples_per_first_syllable):
                 combination = [first_syl]
-                for pos in range(1, len(syldict)):
-                    combination.append(random.choice(syllable_list[pos]))
+                if junctions is None:
+                    for pos in range(1, len(syldict)):
+                        combination.append(random.choice(syllable_list[pos]))
+                else:
+                    # Only follow legal junctions; drop combinations that hit a dead end
+                    index = first_index
+                    for pos in range(1, len(syldict)):
+                        allowed = legal_next(pos - 1, index)
+                        if not allowed:
+                            break
+                        index = random.choice(allowed)
+                        combination.append(syllable_list[pos][index])
+                    if len(combination) < len(syldict):
+                        continue
                 balanced_samples.append(combination)
                 
         # Shuffle the samples
@@ -293,13 +183,13 @@ class GreekPseudowordGenerator:
             status_callback(f"Analyzing {num_syllables}-syllable words for part of speech: {postype}...")
         
         # Filter words by part of speech and frequency
-        filtered_df = self.lexicons["greeklex"][
+        selected = (
             (self.lexicons["greeklex"].Pos == postype) & 
             (self.lexicons["greeklex"].zipfFreq > freq_threshold)
-        ]
+        ).to_numpy()
         
-        # Extract Word column as a Series
-        df = filtered_df["Word"]
+        # Words are syllabified once per lexicon, not once per call
+        syllabified = self.syllabified_lexicon()
         
         # Create syllable dictionary
         syldict = dict()
@@ -307,16 +197,14 @@ class GreekPseudowordGenerator:
             syldict[n+1] = list()
 
         # Collect syllables from filtered words
-        for wrd in df.values:
-            if isinstance(wrd, str):
-                q = self.remove_oxia(wrd)
-                try:
-                    sl = syllabify(q)
-                    if len(sl) == num_syllables:
-                        for n in range(num_syllables):
-                            syldict[n+1].append(sl[n])
-                except Exception as e:
-                    continue
+        for row in np.flatnonzero(selected):
+            joined = syllabified[row]
+            if not joined:
+                continue
+            sl = joined.split(self.SYLLABLE_SEPARATOR)
+            if len(sl) == num_syllables:
+                for n in range(num_syllables):
+                    syldict[n+1].append(sl[n])
 
         # Get unique syllables
         for k, v in syldict.items():
@@ -338,7 +226,9 @@ class GreekPseudowordGenerator:
         return syldict
     
     def generate_pseudowords_with_syllables(self, syldict, included_last_syllables=None, 
-                                           sim_threshold=0.8, max_words=100, status_callback=None):
+                                           sim_threshold=0.8, max_words=100, status_callback=None,
+                                           min_ngram_count=1, positional_ngrams=False,
+                                           max_ngram_order=3, similarity_backend="bitparallel"):
         """Generate pseudowords with specific syllable constraints"""
         # Track the number of words generated
         count = 0
@@ -363,23 +253,31 @@ class GreekPseudowordGenerator:
             if status_callback:
                 status_callback(f"Using {len(syldict[len(syldict)])} selected last syllables")
         
+        # Rule out syllable pairs whose junction can never pass the tests
+        junctions = self.junction_matrices(syldict, min_ngram_count)
+        if status_callback and junctions:
+            legal_pairs = sum(int(m.sum()) for m in junctions)
+            total_pairs = sum(m.size for m in junctions)
+            status_callback(f"{legal_pairs} of {total_pairs} syllable junctions are legal")
+        
         # Try to get balanced samples to ensure variety in first syllables
-        balanced_samples = self.get_balanced_syllable_samples(syldict, max_words * 5)
+        balanced_samples = self.get_balanced_syllable_samples(syldict, max_words * 5, junctions)
         
         if balanced_samples:
             # Use balanced samples for better variety
             if status_callback:
                 status_callback("Using balanced sampling to ensure variety in first syllables...")
             
-            # Test the balanced samples
-            for combination in balanced_samples:
+            # Test the balanced samples; the n-gram test runs on whole batches first
+            candidates = (''.join(combination) for combination in balanced_samples)
+            for joined_string, ngrams_ok in self.screen_ngrams(candidates, min_ngram_count, positional_ngrams):
                 attempts += 1
                 if count >= max_words or attempts >= max_attempts:
                     break
-                    
-                joined_string = ''.join(combination)
                 
-                if self.accept_reject_tests(joined_string, sim_threshold):
+                if ngrams_ok and self.accept_reject_tests(joined_string, sim_threshold, check_ngrams=False,
+                                                          max_ngram_order=max_ngram_order,
+                                                          similarity_backend=similarity_backend):
                     accepted_words.append(joined_string)
                     count += 1
                     
@@ -390,17 +288,16 @@ class GreekPseudowordGenerator:
             if status_callback:
                 status_callback("Using standard sampling method...")
                 
-            # Standard method using itertools
-            import itertools
-            iterlist = [list(v) for v in syldict.values()]
-            for entry in itertools.product(*iterlist):
+            # Standard method: every combination in order, legal junctions only
+            candidates = (''.join(entry) for entry in self.legal_combinations(syldict, junctions))
+            for joined_string, ngrams_ok in self.screen_ngrams(candidates, min_ngram_count, positional_ngrams):
                 attempts += 1
                 if count >= max_words or attempts >= max_attempts:
                     break
-                    
-                joined_string = ''.join(entry)
                 
-                if self.accept_reject_tests(joined_string, sim_threshold):
+                if ngrams_ok and self.accept_reject_tests(joined_string, sim_threshold, check_ngrams=False,
+                                                          max_ngram_order=max_ngram_order,
+                                                          similarity_backend=similarity_backend):
                     accepted_words.append(joined_string)
                     count += 1
                     
@@ -413,7 +310,9 @@ class GreekPseudowordGenerator:
         return accepted_words
     
     def generate_pseudowords(self, postype="noun", num_syllables=3, freq_threshold=5, sim_threshold=0.8, 
-                            max_words=100, included_last_syllables=None, status_callback=None):
+                            max_words=100, included_last_syllables=None, status_callback=None,
+                            min_ngram_count=1, positional_ngrams=False,
+                            max_ngram_order=3, similarity_backend="bitparallel"):
         """Generate pseudowords"""
         # Send status update
         if status_callback:
@@ -431,7 +330,11 @@ class GreekPseudowordGenerator:
             included_last_syllables=included_last_syllables,
             sim_threshold=sim_threshold,
             max_words=max_words,
-            status_callback=status_callback
+            status_callback=status_callback,
+            min_ngram_count=min_ngram_count,
+            positional_ngrams=positional_ngrams,
+            max_ngram_order=max_ngram_order,
+            similarity_backend=similarity_backend
         )
 
 
@@ -443,6 +346,54 @@ app.secret_key = os.urandom(24)  # Add a secret key for session management
 generator = GreekPseudowordGenerator()
 lexicons_loaded = False
 
+def lexicon_paths(report=False):
+    """
+    Return the (primary, secondary) lexicon paths in the data directory.
+    
+    Pre-converted Parquet/TSV/word-list copies are preferred over the Excel
+    files, which are much slower to parse, unless they are older than them.
+    With report=True the chosen paths are printed.
+    """
+    return (lexicon_sources.find_source('data', 'GreekLex2', '.xlsx', report),
+            lexicon_sources.find_source('data', 'all_num_clean_ns', '.xls', report))
+
+# Background warm-up and reload state; the lock serialises lexicon loads in this process
+lexicon_load_lock = threading.Lock()
+warmup_thread = None
+warmup_error = None
+reload_thread = None
+reload_building = False
+reload_error = None
+
+# Seconds between checks for a lexicon cache published by another worker
+LEXICON_CHECK_INTERVAL = 5.0
+last_lexicon_check = 0.0
+
+# Stress placements tried per word before accepting one that spells an existing word
+STRESS_ATTEMPTS = 5
+
+def configured_similarity_backends():
+    """
+    Return the optional test-3 backends to build with the lexicons.
+    
+    They are named, comma-separated, in the SIMILARITY_BACKENDS environment
+    variable (e.g. SIMILARITY_BACKENDS=symspell,trie); requests may only choose
+    the default backend and these, so no index is ever built inside a request.
+    """
+    backends = []
+    for backend in os.environ.get("SIMILARITY_BACKENDS", "").split(","):
+        backend = backend.strip()
+        if not backend:
+            continue
+        if backend not in GreekPseudowordGenerator.OPTIONAL_SIMILARITY_BACKENDS:
+            print(f"Warning: Ignoring '{backend}' in SIMILARITY_BACKENDS; the optional backends are "
+                  f"{', '.join(GreekPseudowordGenerator.OPTIONAL_SIMILARITY_BACKENDS)}")
+            continue
+        backends.append(backend)
+    return tuple(backends)
+
+PREBUILT_SIMILARITY_BACKENDS = configured_similarity_backends()
+
 # Status messages storage
 generation_status = []
 
@@ -450,6 +401,195 @@ def add_status_message(message):
     """Add a status message with timestamp"""
     generation_status.append({"time": time.strftime("%H:%M:%S"), "message": message})
 
+def load_shared_lexicons(build=False):
+    """
+    Attach this process to the shared, memory-mapped lexicon cache.
+    
+    Workers map the same cache files, so once any worker (or the gunicorn master
+    before forking) has built the cache, every worker picks it up on its next
+    request. With build=True the Excel files are parsed if no cache exists yet.
+    """
+    if lexicons_loaded:
+        return True
+    
+    # Request-path checks never wait behind a load that is already running
+    if not lexicon_load_lock.acquire(blocking=build):
+        return False
+    try:
+        if lexicons_loaded:
+            return True
+        new_generator = build_generator(build)
+        if new_generator is None:
+            return False
+        install_generator(new_generator)
+        return True
+    finally:
+        lexicon_load_lock.release()
+
+def build_generator(build=True):
+    """
+    Return a new, fully loaded generator, or None if the lexicons are unavailable.
+    
+    The shared cache is used when it matches the source files; with build=True the
+    Excel files are parsed (and the cache rebuilt) otherwise. Only those loads, from
+    the warm-up and reload threads, report the chosen source files; request-path
+    checks (build=False) stay quiet.
+    """
+    greeklex_path, all_num_clean_path = lexicon_paths(report=build)
+    if not (os.path.exists(greeklex_path) and os.path.exists(all_num_clean_path)):
+        return None
+    new_generator = GreekPseudowordGenerator()
+    if new_generator.load_cached_lexicons(greeklex_path, all_num_clean_path, lean=True) is None:
+        if not build:
+            return None
+        new_generator.load_lexicons(greeklex_path, all_num_clean_path, lean=True)
+    # Build or map the derived artifacts now rather than on the first request
+    try:
+        new_generator.build_derived_artifacts(PREBUILT_SIMILARITY_BACKENDS)
+    except Exception as e:
+        print(f"Warning: Could not prepare derived lexicon data: {e}")
+    return new_generator
+
+def install_generator(new_generator):
+    """
+    Make new_generator serve all new requests.
+    
+    Rebinding the global is atomic; requests that started earlier keep their own
+    reference and finish against the generator they began with.
+    """
+    global generator, lexicons_loaded
+    generator = new_generator
+    lexicons_loaded = True
+
+def warm_up_lexicons():
+    """Load the lexicons and build their indexes (runs in the warm-up thread)"""
+    global warmup_error
+    try:
+        if not load_shared_lexicons(build=True):
+            warmup_error = "Missing required lexicon file(s). Please place the file(s) in the 'data' directory."
+    except Exception as e:
+        warmup_error = f"Error loading lexicons: {str(e)}"
+        print(f"Warning: Lexicon warm-up failed: {e}")
+
+def warming_up():
+    """Return True while the warm-up thread is running"""
+    return warmup_thread is not None and warmup_thread.is_alive()
+
+def start_warmup():
+    """Start loading the lexicons in the background unless they are loaded or loading"""
+    global warmup_thread, warmup_error
+    if lexicons_loaded or warming_up():
+        return
+    warmup_error = None
+    warmup_thread = threading.Thread(target=warm_up_lexicons, name="lexicon-warmup", daemon=True)
+    warmup_thread.start()
+
+def wait_for_warmup(timeout=None):
+    """Block until the warm-up thread has finished; returns True if lexicons are loaded"""
+    if warmup_thread is not None:
+        warmup_thread.join(timeout)
+    return lexicons_loaded
+
+def reload_lexicons(build=True):
+    """
+    Build a new generator in the background and swap it in (runs in the reload thread).
+    
+    With build=False the reload only happens when another process has published a
+    cache entry that differs from the one this process is serving.
+    """
+    global reload_error
+    try:
+        with lexicon_load_lock:
+            if not build:
+                fingerprint = lexicon_cache.cached_fingerprint(
+                    lexicon_cache.DEFAULT_CACHE_DIR, list(lexicon_paths()))
+                if not fingerprint or fingerprint == generator.fingerprint:
+                    return
+            new_generator = build_generator(build)
+        if new_generator is None:
+            reload_error = "Missing required lexicon file(s). Please place the file(s) in the 'data' directory."
+            return
+        install_generator(new_generator)
+        print("Lexicons reloaded")
+    except Exception as e:
+        reload_error = f"Error reloading lexicons: {str(e)}"
+        print(f"Warning: Lexicon reload failed: {e}")
+
+def reloading():
+    """Return True while the reload thread is running"""
+    return reload_thread is not None and reload_thread.is_alive()
+
+def start_reload(build=True):
+    """Start a background reload unless a load or reload is already running"""
+    global reload_thread, reload_error, reload_building
+    if build and reloading() and not reload_building:
+        # A cache check only maps existing files; let it finish rather than refuse
+        reload_thread.join()
+    if warming_up() or reloading():
+        return False
+    if build:
+        reload_error = None
+    reload_building = build
+    reload_thread = threading.Thread(target=reload_lexicons, args=(build,), name="lexicon-reload", daemon=True)
+    reload_thread.start()
+    return True
+
+@app.before_request
+def pick_up_published_lexicons():
+    """Swap in a lexicon cache entry published by another worker, checking every few seconds"""
+    global last_lexicon_check
+    now = time.monotonic()
+    if not lexicons_loaded or now - last_lexicon_check < LEXICON_CHECK_INTERVAL:
+        return
+    last_lexicon_check = now
+    # The fingerprint check runs in the reload thread, off the request path
+    start_reload(build=False)
+
+def lexicons_not_ready_response():
+    """Reject a request that needs the lexicons before they are loaded"""
+    if warming_up():
+        error_message = 'Lexicons are still loading. Please try again in a few seconds.'
+    else:
+        error_message = warmup_error or 'Lexicons not loaded. Please load lexicons first.'
+    add_status_message(f"ERROR: {error_message}")
+    response = jsonify({
+        'success': False,
+        'message': error_message,
+        'status': generation_status
+    })
+    response.status_code = 503
+    if warming_up():
+        response.headers['Retry-After'] = '5'
+    return response
+
+def similarity_backend_error(gen, backend):
+    """Return why a request may not use the similarity backend, or None if it may"""
+    if backend not in gen.SIMILARITY_BACKENDS:
+        return f"Unknown similarity backend '{backend}'; expected one of {', '.join(gen.SIMILARITY_BACKENDS)}"
+    if not gen.similarity_backend_ready(backend):
+        return (f"Similarity backend '{backend}' is not enabled on this server; "
+                f"add it to SIMILARITY_BACKENDS to build it with the lexicons")
+    return None
+
+def bad_request_response(error_message):
+    """Reject a request whose parameters cannot be used"""
+    add_status_message(f"ERROR: {error_message}")
+    response = jsonify({
+        'success': False,
+        'message': error_message,
+        'status': generation_status
+    })
+    response.status_code = 400
+    return response
+
+# Load the lexicons in the background as soon as the app is imported, so no
+# request has to wait for them; under gunicorn with preload_app this runs in
+# the master and the workers inherit the loaded lexicons. Lexicon ingest
+# workers spawned from `python app.py` import this file as __mp_main__ and
+# must not load anything themselves.
+if __name__ != '__mp_main__':
+    start_warmup()
+
 @app.route('/')
 def index():
     """Render the main page"""
@@ -457,7 +597,7 @@ def index():
     allowed_pos = ["noun", "verb", "adj", "adv", "prep"]
     
     # Filter available POS if lexicons are loaded
-    if lexicons_loaded:
+    if load_shared_lexicons():
         available_pos = generator.get_available_pos()
         filtered_pos = [pos for pos in available_pos if pos in allowed_pos]
     else:
@@ -467,16 +607,53 @@ def index():
                           lexicons_loaded=lexicons_loaded,
                           available_pos=filtered_pos)
 
+@app.route('/live')
+def live():
+    """Liveness probe: the process is up and serving requests"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 200 once the lexicons and their indexes are loaded, 503 before"""
+    if load_shared_lexicons():
+        return jsonify({'ready': True, 'reloading': reloading(), 'reload_error': reload_error})
+    
+    if warming_up():
+        state = 'loading'
+    elif warmup_error:
+        state = 'failed'
+    else:
+        state = 'not_loaded'
+    return jsonify({'ready': False, 'state': state, 'message': warmup_error}), 503
+
+@app.route('/reload_lexicons', methods=['POST'])
+def reload_lexicons_route():
+    """Rebuild the lexicons from the data directory without interrupting requests"""
+    if not lexicons_loaded:
+        return lexicons_not_ready_response()
+    if not start_reload():
+        return jsonify({
+            'success': False,
+            'message': 'A lexicon load is already in progress'
+        }), 409
+    
+    add_status_message("Lexicon reload started; current lexicons keep serving until it completes")
+    return jsonify({
+        'success': True,
+        'message': 'Lexicon reload started',
+        'status': generation_status
+    }), 202
+
 @app.route('/load_lexicons', methods=['POST'])
 def load_lexicons():
     """Load lexicons from data directory"""
-    global lexicons_loaded
     allowed_pos = ["noun", "verb", "adj", "adv", "prep"]
     
-    # Check if lexicon files exist before attempting to load them
-    greeklex_path = os.path.join('data', 'GreekLex2.xlsx')
-    all_num_clean_path = os.path.join('data', 'all_num_clean_ns.xls')
+    if warming_up():
+        return lexicons_not_ready_response()
     
+    # Check if lexicon files exist before attempting to load them
+    greeklex_path, all_num_clean_path = lexicon_paths()
     missing_files = []
     if not os.path.exists(greeklex_path):
         missing_files.append("GreekLex2.xlsx")
@@ -493,9 +670,10 @@ def load_lexicons():
         })
     
     try:
-        # Load lexicons
-        available_pos = generator.load_lexicons(greeklex_path, all_num_clean_path)
-        lexicons_loaded = True
+        # Load lexicons; this builds the shared cache if needed and the other
+        # workers map it on their next request
+        load_shared_lexicons(build=True)
+        available_pos = generator.get_available_pos()
         
         # Filter the available POS to only include our desired options
         filtered_pos = [pos for pos in available_pos if pos in allowed_pos]
@@ -541,14 +719,11 @@ def get_syllables():
     
     try:
         # Check if lexicons are loaded
-        if not lexicons_loaded:
-            error_message = 'Lexicons not loaded. Please load lexicons first.'
-            add_status_message(f"ERROR: {error_message}")
-            return jsonify({
-                'success': False,
-                'message': error_message,
-                'status': generation_status
-            })
+        if not load_shared_lexicons():
+            return lexicons_not_ready_response()
+        
+        # Snapshot the generator; a concurrent reload swaps the global, not this object
+        gen = generator
         
         if include_all_pos:
             # Combine syllables from all POS types
@@ -559,7 +734,7 @@ def get_syllables():
             for pos in postypes:
                 try:
                     # Get syllable dictionary for this POS
-                    syldict = generator.get_syllable_dict(
+                    syldict = gen.get_syllable_dict(
                         postype=pos,
                         num_syllables=num_syllables,
                         freq_threshold=freq_threshold,
@@ -593,7 +768,7 @@ def get_syllables():
             
         else:
             # Get syllable dictionary for single POS
-            syldict = generator.get_syllable_dict(
+            syldict = gen.get_syllable_dict(
                 postype=postype,
                 num_syllables=num_syllables,
                 freq_threshold=freq_threshold,
@@ -640,6 +815,10 @@ def generate():
     freq_threshold = float(request.form.get('freq_threshold', 5.0))
     sim_threshold = float(request.form.get('sim_threshold', 0.8))
     max_words = int(request.form.get('max_words', 20))
+    min_ngram_count = int(request.form.get('min_ngram_count', 1))
+    positional_ngrams = request.form.get('positional_ngrams', 'false').lower() == 'true'
+    max_ngram_order = int(request.form.get('max_ngram_order', 3))
+    similarity_backend = request.form.get('similarity_backend', 'bitparallel')
     
     # Get included last syllables
     included_last_syllables_str = request.form.get('included_last_syllables')
@@ -659,14 +838,15 @@ def generate():
     
     try:
         # Check if lexicons are loaded
-        if not lexicons_loaded:
-            error_message = 'Lexicons not loaded. Please load lexicons first.'
-            add_status_message(f"ERROR: {error_message}")
-            return jsonify({
-                'success': False,
-                'message': error_message,
-                'status': generation_status
-            })
+        if not load_shared_lexicons():
+            return lexicons_not_ready_response()
+        
+        # Snapshot the generator; a concurrent reload swaps the global, not this object
+        gen = generator
+        
+        backend_error = similarity_backend_error(gen, similarity_backend)
+        if backend_error:
+            return bad_request_response(backend_error)
         
         generated_words = []
         
@@ -679,13 +859,17 @@ def generate():
             for pos in postypes:
                 add_status_message(f"Generating {words_per_type} {pos} pseudowords...")
                 # Call the generation function for each POS
-                pos_words = generator.generate_pseudowords(
+                pos_words = gen.generate_pseudowords(
                     postype=pos,
                     num_syllables=num_syllables,
                     freq_threshold=freq_threshold,
                     sim_threshold=sim_threshold,
                     max_words=words_per_type,
                     included_last_syllables=included_last_syllables,
+                    min_ngram_count=min_ngram_count,
+                    positional_ngrams=positional_ngrams,
+                    max_ngram_order=max_ngram_order,
+                    similarity_backend=similarity_backend,
                     status_callback=add_status_message
                 )
                 generated_words.extend(pos_words)
@@ -693,13 +877,17 @@ def generate():
         else:
             # Original logic for a single POS type
             add_status_message(f"Generating {max_words} {postype} pseudowords...")
-            generated_words = generator.generate_pseudowords(
+            generated_words = gen.generate_pseudowords(
                 postype=postype,
                 num_syllables=num_syllables,
                 freq_threshold=freq_threshold,
                 sim_threshold=sim_threshold,
                 max_words=max_words,
                 included_last_syllables=included_last_syllables,
+                min_ngram_count=min_ngram_count,
+                positional_ngrams=positional_ngrams,
+                max_ngram_order=max_ngram_order,
+                similarity_backend=similarity_backend,
                 status_callback=add_status_message
             )
             add_status_message(f"Generated {len(generated_words)} {postype} pseudowords")
@@ -710,7 +898,11 @@ def generate():
             'postype': postype,
             'num_syllables': num_syllables,
             'freq_threshold': freq_threshold,
-            'sim_threshold': sim_threshold
+            'sim_threshold': sim_threshold,
+            'min_ngram_count': min_ngram_count,
+            'positional_ngrams': positional_ngrams,
+            'max_ngram_order': max_ngram_order,
+            'similarity_backend': similarity_backend
         }
         
         add_status_message(f"Total pseudowords generated: {len(generated_words)}")
@@ -718,6 +910,8 @@ def generate():
         return jsonify({
             'success': True,
             'pseudowords': generated_words,
+            # Summed and minimum n-gram type/token counts of each word
+            'ngram_stats': {word: gen.ngram_statistics(word) for word in generated_words},
             'status': generation_status
         })
         
@@ -747,10 +941,19 @@ def apply_stress_rules():
             })
         
         # Apply stress to each word
+        gen = generator
         stressed_words = []
         for word in words:
             try:
                 stressed_word = add_random_stress(word, part_of_speech)
+                # Prefer a stress placement that does not spell an attested accented word
+                if lexicons_loaded:
+                    for _ in range(STRESS_ATTEMPTS):
+                        if not gen.is_attested(stressed_word, "nfc"):
+                            break
+                        stressed_word = add_random_stress(word, part_of_speech)
+                    if gen.is_attested(stressed_word, "nfc"):
+                        add_status_message(f"Warning: Stressed '{word}' is an existing word: {stressed_word}")
                 stressed_words.append(stressed_word)
             except Exception as e:
                 # If stress application fails, add the word without stress
@@ -803,14 +1006,11 @@ def download_csv():
         # If no ordered words were provided, generate new words
         if not ordered_words_json:
             # Check if lexicons are loaded
-            if not lexicons_loaded:
-                error_message = "Lexicons not loaded. Please load lexicons before generating CSV."
-                add_status_message(f"ERROR: {error_message}")
-                return jsonify({
-                    'success': False,
-                    'message': error_message,
-                    'status': generation_status
-                })
+            if not load_shared_lexicons():
+                return lexicons_not_ready_response()
+            
+            # Snapshot the generator; a concurrent reload swaps the global, not this object
+            gen = generator
                 
             # Get parameters from request
             postype = request.form.get('postype', 'noun')
@@ -818,6 +1018,14 @@ def download_csv():
             freq_threshold = float(request.form.get('freq_threshold', 5.0))
             sim_threshold = float(request.form.get('sim_threshold', 0.8))
             max_words = int(request.form.get('max_words', 20))
+            min_ngram_count = int(request.form.get('min_ngram_count', 1))
+            positional_ngrams = request.form.get('positional_ngrams', 'false').lower() == 'true'
+            max_ngram_order = int(request.form.get('max_ngram_order', 3))
+            similarity_backend = request.form.get('similarity_backend', 'bitparallel')
+            
+            backend_error = similarity_backend_error(gen, similarity_backend)
+            if backend_error:
+                return bad_request_response(backend_error)
             
             included_last_syllables_str = request.form.get('included_last_syllables')
             
@@ -834,24 +1042,32 @@ def download_csv():
                 pseudowords = []
                 
                 for pos in postypes:
-                    pos_words = generator.generate_pseudowords(
+                    pos_words = gen.generate_pseudowords(
                         postype=pos,
                         num_syllables=num_syllables,
                         freq_threshold=freq_threshold,
                         sim_threshold=sim_threshold,
                         max_words=words_per_type,
                         included_last_syllables=included_last_syllables,
+                        min_ngram_count=min_ngram_count,
+                        positional_ngrams=positional_ngrams,
+                        max_ngram_order=max_ngram_order,
+                        similarity_backend=similarity_backend,
                         status_callback=add_status_message
                     )
                     pseudowords.extend(pos_words)
             else:
-                pseudowords = generator.generate_pseudowords(
+                pseudowords = gen.generate_pseudowords(
                     postype=postype,
                     num_syllables=num_syllables,
                     freq_threshold=freq_threshold,
                     sim_threshold=sim_threshold,
                     max_words=max_words,
                     included_last_syllables=included_last_syllables,
+                    min_ngram_count=min_ngram_count,
+                    positional_ngrams=positional_ngrams,
+                    max_ngram_order=max_ngram_order,
+                    similarity_backend=similarity_backend,
                     status_callback=add_status_message
                 )
         
@@ -895,9 +1111,7 @@ if __name__ == '__main__':
     os.makedirs('data', exist_ok=True)
     
     # Check if lexicon files exist
-    greeklex_path = os.path.join('data', 'GreekLex2.xlsx')
-    all_num_clean_path = os.path.join('data', 'all_num_clean_ns.xls')
-    
+    greeklex_path, all_num_clean_path = lexicon_paths()
     missing_files = []
     if not os.path.exists(greeklex_path):
         missing_files.append("GreekLex2.xlsx")
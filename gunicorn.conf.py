@@ -0,0 +1,22 @@
+# Gunicorn settings for production: gunicorn -c gunicorn.conf.py app:app
+bind = "0.0.0.0:5000"
+workers = 4
+
+# Import app.py once in the master so the lexicon cache is built and mapped
+# before the workers fork; they then share its pages instead of each holding
+# a private copy of the lexicons
+preload_app = True
+
+
+def on_starting(server):
+    """Finish the lexicon warm-up in the master before any worker forks"""
+    import app
+    app.start_warmup()
+    if not app.wait_for_warmup():
+        server.log.warning("Lexicons not loaded; workers will start without lexicons")
+
+
+def post_fork(server, worker):
+    """Retry the warm-up in a worker that forked without lexicons"""
+    import app
+    app.start_warmup()
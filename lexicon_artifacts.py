@@ -0,0 +1,572 @@
+## Derived lexicon artifacts and the word tests built on them, shared by the app and the CLI
+import itertools
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+import lexicon_normalize
+from similarity_index import (BitParallelIndex, BKTree, DeletionIndex, EncodedLexicon, LexiconTrie,
+                              PhoneticKeyIndex, QGramIndex, SimilarityIndex, SymSpellIndex, TrieIndex)
+from substring_index import SubstringIndex
+
+
+class DerivedArtifacts:
+    """
+    Builders of the artifacts derived from the lexicons (syllables, n-gram
+    counts and the substring, phonetic and similarity indexes), and the
+    accept/reject tests and syllable-junction pruning that use them.
+    
+    Mixed into both GreekPseudowordGenerator classes; lexicons, combined_lex,
+    artifacts, _derived and _derived_lock come from LexiconLoader, remove_oxia
+    and syllabify from the generator.
+    """
+    
+    # Version of each derived artifact's builder, keyed by the artifact name up to
+    # the first dot; bump it when the output changes
+    ARTIFACT_VERSIONS = {
+        "syllables": 1,
+        "ngrams": 3,
+        "ngram_codes": 1,
+        "substrings": 1,
+        "phonetic": 1,
+        "phonetic_keys": 1,
+        "bktree": 2,
+        "encoded": 1,
+        "qgrams": 1,
+        "deletions": 1,
+        "trie": 1
+    }
+    
+    SYLLABLE_SEPARATOR = "\x1f"
+    
+    # Fields of an ngram_table entry; the positional fields count the lexicon words
+    # with the n-gram word-initially, word-internally and word-finally
+    NGRAM_FIELDS = ("types", "tokens", "initial", "medial", "final")
+    EMPTY_NGRAM = (0, 0.0, 0, 0, 0)
+    
+    # Dense, integer-coded copies of the n-gram counts for batch checks
+    NGRAM_CODE_FIELDS = ("types", "initial", "medial", "final")
+    # Above this many letters the trigram arrays get too big; batches fall back to dict lookups
+    MAX_NGRAM_ALPHABET = 128
+    NGRAM_BATCH_SIZE = 4096
+    # Interchangeable exact implementations of test 3 (see similarity_index.py)
+    SIMILARITY_BACKENDS = ("bitparallel", "bktree", "symspell", "trie")
+    # Built on first use, or up front when passed to build_derived_artifacts
+    OPTIONAL_SIMILARITY_BACKENDS = ("bktree", "symspell", "trie")
+    
+    # Applied in order by phonetic_string (and phonetic_lexicon)
+    PHONETIC_SUBSTITUTIONS = {
+        "αι": "ε",
+        "ει": "ι",
+        "οι": "ι",
+        "υι": "ι",
+        "ω": "ο",
+        "η": "ι",
+        "υ": "ι"
+    }
+    
+    def derived_artifact(self, name, build):
+        """
+        Return a derived artifact (a dict of columns), building it at most once.
+        
+        When the lexicons came from the cache the artifact is read from, or saved
+        to, the cache entry under the lexicon fingerprint and its ARTIFACT_VERSIONS
+        entry, so every process reuses the same memory-mapped files.
+        """
+        version = self.ARTIFACT_VERSIONS[name.split(".")[0]]
+        with self._derived_lock:
+            if name not in self._derived:
+                columns = self.artifacts.load(name, version) if self.artifacts else None
+                if columns is None:
+                    columns = build()
+                    if self.artifacts:
+                        try:
+                            self.artifacts.save(name, version, columns)
+                            columns = self.artifacts.load(name, version) or columns
+                        except Exception as e:
+                            print(f"Warning: Could not cache {name}: {e}")
+                self._derived[name] = columns
+            return self._derived[name]
+    
+    def build_derived_artifacts(self, optional_backends=()):
+        """Build (or map) every derived artifact up front, with the given optional similarity backends"""
+        self.syllabified_lexicon()
+        self.ngram_table()
+        self.ngram_codes()
+        self.substring_index()
+        self.phonetic_lexicon()
+        self.phonetic_key_index()
+        for backend in self.SIMILARITY_BACKENDS:
+            if backend not in self.OPTIONAL_SIMILARITY_BACKENDS or backend in optional_backends:
+                self.similarity_index(backend)
+    
+    def similarity_backend_ready(self, backend):
+        """Return whether backend can answer test 3 without building its index first"""
+        if backend not in self.OPTIONAL_SIMILARITY_BACKENDS:
+            return backend in self.SIMILARITY_BACKENDS
+        return f"similarity_index.{backend}" in self._derived
+    
+    def syllabified_lexicon(self):
+        """
+        Return the syllables of every primary-lexicon word, row-aligned with it.
+        
+        Each entry holds the syllables joined by SYLLABLE_SEPARATOR, or '' when the
+        word could not be syllabified.
+        """
+        def build():
+            rows = []
+            for wrd in self.lexicons["greeklex"]["Word"].values:
+                if not isinstance(wrd, str):
+                    rows.append("")
+                    continue
+                try:
+                    rows.append(self.SYLLABLE_SEPARATOR.join(self.syllabify(self.remove_oxia(wrd))))
+                except Exception:
+                    rows.append("")
+            return {"syllables": rows}
+        
+        # The syllabifier differs between entry points, so it is part of the name
+        name = f"syllables.{getattr(self.syllabify, '__module__', None)}"
+        return self.derived_artifact(name, build)["syllables"]
+    
+    def ngram_table(self):
+        """
+        Return {ngram: counts} for every 2- and 3-gram in combined_lex.
+        
+        counts is a tuple laid out as NGRAM_FIELDS. The type count is the number of
+        lexicon words containing the n-gram; the token count sums the frequency per
+        million (10 ** (zipfFreq - 3)) of the primary-lexicon words containing it, so
+        n-grams only found in the secondary lexicon have 0.
+        """
+        table = self._derived.get("ngram_table")
+        if table is None:
+            def build():
+                types = Counter()
+                positions = {position: Counter() for position in self.NGRAM_FIELDS[2:]}
+                for word in self.combined_lex:
+                    ngrams_2, ngrams_3 = self.generate_ngrams(word)
+                    types.update(set(ngrams_2 + ngrams_3))
+                    for ngrams in (ngrams_2, ngrams_3):
+                        for position, found in self.ngram_positions(ngrams).items():
+                            positions[position].update(found)
+                tokens = dict.fromkeys(types, 0.0)
+                greeklex = self.lexicons["greeklex"]
+                zipf = pd.to_numeric(greeklex["zipfFreq"], errors="coerce").to_numpy(dtype=np.float64)
+                per_million = np.nan_to_num(np.power(10.0, zipf - 3))
+                for word, frequency in zip(greeklex["Word"].values, per_million.tolist()):
+                    ngrams_2, ngrams_3 = self.generate_ngrams(word)
+                    for ngram in set(ngrams_2 + ngrams_3):
+                        if ngram in tokens:
+                            tokens[ngram] += frequency
+                ngrams = sorted(types)
+                columns = {
+                    "ngrams": ngrams,
+                    "types": np.array([types[g] for g in ngrams], dtype=np.int32),
+                    "tokens": np.array([tokens[g] for g in ngrams], dtype=np.float64)
+                }
+                for position, counts in positions.items():
+                    columns[position] = np.array([counts[g] for g in ngrams], dtype=np.int32)
+                return columns
+            
+            columns = self.derived_artifact("ngrams", build)
+            # Hash lookups need a real dict; it is small next to the lexicon
+            fields = [columns[field].tolist() for field in self.NGRAM_FIELDS]
+            table = dict(zip(columns["ngrams"], zip(*fields)))
+            self._derived["ngram_table"] = table
+        return table
+    
+    def ngram_codes(self):
+        """
+        Return the n-gram counts as dense arrays indexed by integer letter codes.
+        
+        Letters of the lexicon get codes 1..len(alphabet) and every other character
+        code 0, which has no attested n-grams. For each NGRAM_FIELDS count except
+        tokens there is an array of shape (size, size) for bigrams ("types2", ...)
+        and (size, size, size) for trigrams ("types3", ...). Built from ngram_table
+        without another lexicon pass; None when the alphabet is too large.
+        """
+        if "ngram_codes" not in self._derived:
+            def build():
+                table = self.ngram_table()
+                alphabet = sorted({ch for ngram in table for ch in ngram})
+                codes = {ch: i + 1 for i, ch in enumerate(alphabet)}
+                size = len(alphabet) + 1
+                columns = {"alphabet": alphabet}
+                for field in self.NGRAM_CODE_FIELDS:
+                    for n in (2, 3):
+                        columns[f"{field}{n}"] = np.zeros((size,) * n, dtype=np.int32)
+                for ngram, counts in table.items():
+                    index = tuple(codes[ch] for ch in ngram)
+                    for field in self.NGRAM_CODE_FIELDS:
+                        columns[f"{field}{len(ngram)}"][index] = counts[self.NGRAM_FIELDS.index(field)]
+                return columns
+            
+            coded = None
+            alphabet_size = len({ch for ngram in self.ngram_table() for ch in ngram})
+            if alphabet_size <= self.MAX_NGRAM_ALPHABET:
+                coded = dict(self.derived_artifact("ngram_codes", build))
+                alphabet = list(coded["alphabet"])
+                # Code point -> letter code; the extra last slot catches anything beyond
+                lookup = np.zeros(max(ord(ch) for ch in alphabet) + 2 if alphabet else 1, dtype=np.intp)
+                for i, ch in enumerate(alphabet):
+                    lookup[ord(ch)] = i + 1
+                coded["lookup"] = lookup
+                coded["size"] = len(alphabet) + 1
+            self._derived["ngram_codes"] = coded
+        return self._derived["ngram_codes"]
+    
+    def encode_words(self, words, lookup):
+        """Encode words as a zero-padded (len(words), max length) array of letter codes"""
+        lengths = np.fromiter((len(w) for w in words), dtype=np.intp, count=len(words))
+        points = np.frombuffer("".join(words).encode("utf-32-le"), dtype=np.uint32)
+        grid = np.zeros((len(words), int(lengths.max()) if len(words) else 0), dtype=np.intp)
+        if len(points):
+            rows = np.repeat(np.arange(len(words)), lengths)
+            starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+            grid[rows, np.arange(len(points)) - starts] = lookup[np.minimum(points, len(lookup) - 1)]
+        return grid, lengths
+    
+    def batch_ngram_test(self, words, min_count=1, positional=False):
+        """
+        Return a boolean array telling which words pass the n-gram test.
+        
+        Gives the same answers as search_ngrams_in_lexicon, but looks up the n-grams
+        of the whole batch with one fancy-indexing operation per n-gram length.
+        """
+        words = [w if isinstance(w, str) else str(w) for w in words]
+        coded = self.ngram_codes()
+        if coded is None:
+            return np.array([self.search_ngrams_in_lexicon(*self.generate_ngrams(w), min_count, positional)
+                             for w in words], dtype=bool)
+        
+        grid, lengths = self.encode_words(words, coded["lookup"])
+        passed = np.ones(len(words), dtype=bool)
+        for n in (2, 3):
+            width = grid.shape[1] - n + 1
+            if width <= 0:
+                continue
+            # Flat index of every n-gram into the (size,) * n count arrays
+            index = grid[:, :width]
+            for k in range(1, n):
+                index = index * coded["size"] + grid[:, k:width + k]
+            start = np.arange(width)[None, :]
+            last = (lengths - n)[:, None]
+            valid = start <= last
+            if positional:
+                initial = start == 0
+                final = start == last
+                medial = ~initial & ~final
+                ok = ((~initial | (coded[f"initial{n}"].ravel()[index] >= min_count))
+                      & (~final | (coded[f"final{n}"].ravel()[index] >= min_count))
+                      & (~medial | (coded[f"medial{n}"].ravel()[index] >= min_count)))
+            else:
+                ok = coded[f"types{n}"].ravel()[index] >= min_count
+            passed &= np.all(ok | ~valid, axis=1)
+        return passed
+    
+    def screen_ngrams(self, words, min_count=1, positional=False):
+        """Yield (word, passes n-gram test) pairs, testing NGRAM_BATCH_SIZE words at a time"""
+        words = iter(words)
+        while True:
+            batch = list(itertools.islice(words, self.NGRAM_BATCH_SIZE))
+            if not batch:
+                return
+            yield from zip(batch, self.batch_ngram_test(batch, min_count, positional).tolist())
+    
+    def substring_index(self):
+        """Return the suffix automaton of combined_lex (see substring_index.py)"""
+        if "substring_index" not in self._derived:
+            columns = self.derived_artifact(
+                "substrings",
+                lambda: SubstringIndex.from_words(self.combined_lex).columns())
+            self._derived["substring_index"] = SubstringIndex.from_columns(columns)
+        return self._derived["substring_index"]
+    
+    def phonetic_lexicon(self):
+        """
+        Return the phonetic form of every combined_lex word, row-aligned with it.
+        
+        The substitutions run over the whole lexicon as vectorized replaces, in the
+        same order phonetic_string applies them.
+        """
+        def build():
+            forms = pd.Series(list(self.combined_lex), dtype=object)
+            for pattern, replacement in self.PHONETIC_SUBSTITUTIONS.items():
+                forms = forms.str.replace(pattern, replacement, regex=False)
+            return {"phonetic": forms.tolist()}
+        
+        return self.derived_artifact("phonetic", build)["phonetic"]
+    
+    def phonetic_key_index(self):
+        """Return the index from phonetic form to the combined_lex words that have it"""
+        if "phonetic_key_index" not in self._derived:
+            columns = self.derived_artifact(
+                "phonetic_keys",
+                lambda: PhoneticKeyIndex.from_forms(self.combined_lex, self.phonetic_lexicon()).columns())
+            self._derived["phonetic_key_index"] = PhoneticKeyIndex.from_columns(self.combined_lex, columns)
+        return self._derived["phonetic_key_index"]
+    
+    def homophones(self, word):
+        """Return the lexicon words that sound exactly like word"""
+        return self.phonetic_key_index().homophones(self.phonetic_string(str(word)))
+    
+    def similarity_index(self, backend="bitparallel"):
+        """
+        Return the test-3 index of combined_lex and its phonetic forms (see similarity_index.py).
+        
+        "bitparallel" narrows the lexicon with a q-gram count filter and scores the
+        rest with the bit-parallel edit-distance kernel; "bktree" searches the BK-trees;
+        "symspell" looks up deletion neighbourhoods and falls back to "bitparallel"
+        for edit radii beyond the indexed depth; "trie" walks a Levenshtein automaton
+        over the lexicon tries.
+        """
+        if backend not in self.SIMILARITY_BACKENDS:
+            raise ValueError(f"Unknown similarity backend '{backend}'; expected one of {', '.join(self.SIMILARITY_BACKENDS)}")
+        key = f"similarity_index.{backend}"
+        if key not in self._derived:
+            if backend == "bktree":
+                orthographic = self.derived_artifact(
+                    "bktree.orthographic",
+                    lambda: BKTree.from_words(self.combined_lex).columns())
+                phonetic = self.derived_artifact(
+                    "bktree.phonetic",
+                    lambda: BKTree.from_words(self.phonetic_lexicon()).columns())
+                self._derived[key] = SimilarityIndex(
+                    BKTree.from_columns(orthographic), BKTree.from_columns(phonetic), self.phonetic_string)
+            elif backend == "trie":
+                orthographic = self.derived_artifact(
+                    "trie.orthographic",
+                    lambda: LexiconTrie.from_words(self.combined_lex).columns())
+                phonetic = self.derived_artifact(
+                    "trie.phonetic",
+                    lambda: LexiconTrie.from_words(self.phonetic_lexicon()).columns())
+                self._derived[key] = TrieIndex(
+                    LexiconTrie.from_columns(orthographic), LexiconTrie.from_columns(phonetic), self.phonetic_string)
+            elif backend == "symspell":
+                orthographic = self.derived_artifact(
+                    "deletions.orthographic",
+                    lambda: DeletionIndex.from_words(self.combined_lex).columns())
+                phonetic = self.derived_artifact(
+                    "deletions.phonetic",
+                    lambda: DeletionIndex.from_words(self.phonetic_lexicon()).columns())
+                self._derived[key] = SymSpellIndex(
+                    DeletionIndex.from_columns(orthographic), DeletionIndex.from_columns(phonetic),
+                    self.phonetic_string, self.similarity_index("bitparallel"))
+            else:
+                orthographic = EncodedLexicon.from_columns(self.derived_artifact(
+                    "encoded.orthographic",
+                    lambda: EncodedLexicon.from_words(self.combined_lex).columns()))
+                phonetic = EncodedLexicon.from_columns(self.derived_artifact(
+                    "encoded.phonetic",
+                    lambda: EncodedLexicon.from_words(self.phonetic_lexicon()).columns()))
+                qgrams = tuple(
+                    QGramIndex.from_columns(lexicon, self.derived_artifact(
+                        f"qgrams.{name}",
+                        lambda lexicon=lexicon: QGramIndex.from_lexicon(lexicon).columns()))
+                    for name, lexicon in (("orthographic", orthographic), ("phonetic", phonetic)))
+                self._derived[key] = BitParallelIndex(orthographic, phonetic, self.phonetic_string, qgrams)
+        return self._derived[key]
+    
+    def ngram_positions(self, ngrams):
+        """
+        Split the n-grams of one word, in order, into initial, medial and final sets.
+        
+        When the n-gram is the whole word it is both initial and final.
+        """
+        if not ngrams:
+            return {"initial": set(), "medial": set(), "final": set()}
+        return {"initial": {ngrams[0]}, "medial": set(ngrams[1:-1]), "final": {ngrams[-1]}}
+    
+    def ngram_statistics(self, word):
+        """
+        Return the summed and minimum type and token counts of a word's n-grams.
+        
+        Accents are ignored, so stressed words get the counts of their unstressed form.
+        """
+        table = self.ngram_table()
+        ngrams_2, ngrams_3 = self.generate_ngrams(lexicon_normalize.normalize_word(word, "plain"))
+        counts = [table.get(ngram, self.EMPTY_NGRAM) for ngram in ngrams_2 + ngrams_3]
+        if not counts:
+            return {"type_sum": 0, "type_min": 0, "token_sum": 0.0, "token_min": 0.0}
+        types = [c[0] for c in counts]
+        tokens = [c[1] for c in counts]
+        return {
+            "type_sum": sum(types),
+            "type_min": min(types),
+            "token_sum": sum(tokens),
+            "token_min": min(tokens)
+        }
+    
+    def phonetic_string(self, input_string):
+        """Convert string to phonetic representation"""
+        if not isinstance(input_string, str):
+            input_string = str(input_string)
+            
+        output_string = input_string
+        for pattern, replacement in self.PHONETIC_SUBSTITUTIONS.items():
+            output_string = output_string.replace(pattern, replacement)
+        return output_string
+    
+    def generate_ngrams(self, text):
+        """Generate n-grams from text"""
+        if not isinstance(text, str):
+            text = str(text)
+            
+        ngrams_2 = [text[i:i+2] for i in range(len(text)-1)]
+        ngrams_3 = [text[i:i+3] for i in range(len(text)-2)]
+        return ngrams_2, ngrams_3
+    
+    def search_ngrams_in_lexicon(self, ngrams_2, ngrams_3, min_count=1, positional=False):
+        """Search n-grams in lexicon"""
+        # Every n-gram must occur in at least min_count lexicon words
+        table = self.ngram_table()
+        if not positional:
+            return all(table.get(ngram, self.EMPTY_NGRAM)[0] >= min_count for ngram in ngrams_2 + ngrams_3)
+        
+        # With positional=True it must occur there in the same position of the word
+        for ngrams in (ngrams_2, ngrams_3):
+            for position, found in self.ngram_positions(ngrams).items():
+                field = self.NGRAM_FIELDS.index(position)
+                if any(table.get(ngram, self.EMPTY_NGRAM)[field] < min_count for ngram in found):
+                    return False
+        return True
+    
+    def max_consecutively_repeated_letters(self, string):
+        """Count maximum consecutively repeated letters"""
+        if not isinstance(string, str):
+            string = str(string)
+            
+        max_count = 0
+        current_count = 0
+        previous_letter = None
+
+        for letter in string:
+            if letter.isalpha():
+                letter = letter.lower()
+                if letter == previous_letter:
+                    current_count += 1
+                else:
+                    current_count = 1
+                    previous_letter = letter
+
+                if current_count > max_count:
+                    max_count = current_count
+        return max_count
+    
+    def is_attested(self, word, view="plain"):
+        """
+        Return whether word is in the combined lexicon under one view.
+        
+        "nfc" matches accents exactly, "plain" ignores them and "lower" also
+        ignores case.
+        """
+        return self.lexicon_views.contains(word, view)
+    
+    def accept_reject_tests(self, string1, simthreshold=0.5, lexicon_view="plain", min_ngram_count=1,
+                            positional_ngrams=False, check_ngrams=True, max_ngram_order=3,
+                            similarity_backend="bitparallel"):
+        """
+        Apply tests to accept or reject pseudowords.
+        
+        check_ngrams=False skips the 2-/3-gram test for words already screened by
+        batch_ngram_test. With max_ngram_order above 3 every n-gram up to that length
+        must also be attested, which the substring index checks in one pass.
+        """
+        # Ensure input is a string
+        if not isinstance(string1, str):
+            string1 = str(string1)
+            
+        # Test 1: Reject if the word exists in the lexicon
+        if self.is_attested(string1, lexicon_view):
+            return False
+        
+        # Test 2: Reject if there are consecutively repeated letters
+        if self.max_consecutively_repeated_letters(string1) > 1:
+            return False
+        
+        # Test 3: Reject exact pseudohomophones with a single phonetic-key lookup,
+        # before any edit distance is computed
+        phonetic = self.phonetic_string(string1)
+        if simthreshold < 1 and phonetic in self.phonetic_key_index():
+            return False
+        
+        # Then check similarity and phonetic_similarity against every lexicon word;
+        # every backend in SIMILARITY_BACKENDS only compares words within the edit
+        # distance the threshold allows
+        if self.similarity_index(similarity_backend).any_similar(string1, simthreshold, phonetic):
+            return False
+                
+        # Test 4: Check if all n-grams exist in the lexicon
+        if check_ngrams:
+            ngrams_2, ngrams_3 = self.generate_ngrams(string1)
+            test = self.search_ngrams_in_lexicon(ngrams_2, ngrams_3, min_ngram_count, positional_ngrams)
+            if not test:
+                return False
+        
+        # Longer n-grams are looked up in the substring index
+        if max_ngram_order > 3 and not self.substring_index().all_attested(string1, max_ngram_order):
+            return False
+
+        return True
+
+    def junction_matrices(self, syldict, min_count=1):
+        """
+        Return a boolean legality matrix for each pair of adjacent syllable positions.
+        
+        Entry [i, j] of the k-th matrix tells whether syllable i of position k+1 may
+        be followed by syllable j of position k+2. A pair is illegal when it doubles a
+        letter across the boundary, or when a bigram or trigram spanning the boundary
+        is attested in fewer than min_count words; every candidate containing such a
+        pair would fail accept_reject_tests.
+        """
+        coded = self.ngram_codes()
+        
+        def letters(syllables, index):
+            # The letter at index of each syllable ('' when it is too short)
+            return [s[index] if -len(s) <= index < len(s) else "" for s in syllables]
+        
+        def codes(chars):
+            lookup = coded["lookup"]
+            points = np.array([ord(ch) if ch else 0 for ch in chars], dtype=np.intp)
+            return lookup[np.minimum(points, len(lookup) - 1)]
+        
+        matrices = []
+        for pos in range(1, len(syldict)):
+            left = [str(s) for s in syldict[pos]]
+            right = [str(s) for s in syldict[pos + 1]]
+            last = letters(left, -1)
+            first = letters(right, 0)
+            
+            # A letter repeated across the boundary (see max_consecutively_repeated_letters)
+            last_lower = np.array([ch.lower() if ch.isalpha() else "" for ch in last])
+            first_lower = np.array([ch.lower() if ch.isalpha() else "" for ch in first])
+            legal = (last_lower[:, None] != first_lower[None, :]) | (last_lower[:, None] == "")
+            
+            if coded is not None:
+                a1 = codes(last)[:, None]
+                a2 = codes(letters(left, -2))[:, None]
+                b1 = codes(first)[None, :]
+                b2 = codes(letters(right, 1))[None, :]
+                left_short = np.array([len(s) < 2 for s in left])[:, None]
+                right_short = np.array([len(s) < 2 for s in right])[None, :]
+                legal &= coded["types2"][a1, b1] >= min_count
+                legal &= left_short | (coded["types3"][a2, a1, b1] >= min_count)
+                legal &= right_short | (coded["types3"][a1, b1, b2] >= min_count)
+            matrices.append(legal)
+        return matrices
+    
+    def legal_combinations(self, syldict, junctions):
+        """Yield syllable combinations in itertools.product order, skipping illegal junctions"""
+        values = [list(v) for v in syldict.values()]
+        
+        def extend(prefix, pos, index):
+            if pos == len(values):
+                yield prefix
+                return
+            following = range(len(values[0])) if pos == 0 else np.flatnonzero(junctions[pos - 1][index]).tolist()
+            for j in following:
+                yield from extend(prefix + [values[pos][j]], pos + 1, j)
+        
+        if values:
+            yield from extend([], 0, None)
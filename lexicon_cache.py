@@ -0,0 +1,294 @@
+## Persistent columnar cache for the Excel lexicons
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+# Bump when the layout of the cached columns changes
+CACHE_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.path.join('data', 'cache')
+SOURCES_FILE = 'sources.json'
+MANIFEST_FILE = 'manifest.json'
+
+
+def file_digest(path):
+    """Return the SHA-1 hex digest of a file's contents"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_stat(path):
+    """Return the size/mtime record of a source file"""
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def source_fingerprint(paths):
+    """Fingerprint source files by size, mtime and content hash"""
+    sources = []
+    for path in paths:
+        if not path:
+            continue
+        record = source_stat(path)
+        record["sha1"] = file_digest(path)
+        sources.append(record)
+    key = hashlib.sha1()
+    key.update(f"v{CACHE_VERSION}".encode('ascii'))
+    for record in sources:
+        key.update(record["sha1"].encode('ascii'))
+    return key.hexdigest(), sources
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def cached_fingerprint(cache_dir, paths):
+    """
+    Return the fingerprint of the cache entry matching the source files, or None.
+
+    Size and mtime are checked first; the content hash is only recomputed when
+    they differ, so a touched but unchanged file keeps its cache entry.
+    """
+    index = _read_json(os.path.join(cache_dir, SOURCES_FILE))
+    if not index:
+        return None
+    paths = [p for p in paths if p]
+    recorded = index.get("sources", [])
+    if len(recorded) != len(paths):
+        return None
+
+    refreshed = False
+    for record, path in zip(recorded, paths):
+        if not os.path.exists(path):
+            return None
+        current = source_stat(path)
+        if record["path"] != current["path"] or record["size"] != current["size"]:
+            return None
+        if record["mtime"] != current["mtime"]:
+            if file_digest(path) != record["sha1"]:
+                return None
+            record["mtime"] = current["mtime"]
+            refreshed = True
+
+    fingerprint = index.get("fingerprint")
+    if not fingerprint or not os.path.exists(os.path.join(cache_dir, fingerprint, MANIFEST_FILE)):
+        return None
+    if refreshed:
+        _write_json(os.path.join(cache_dir, SOURCES_FILE), index)
+    return fingerprint
+
+
+def encode_strings(values):
+    """Pack strings into a UTF-8 blob and an int32 offset array"""
+    encoded = [str(v).encode('utf-8') for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+    if encoded:
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return offsets, blob
+
+
+class PackedStrings:
+    """
+    Read-only sequence of strings stored as a UTF-8 blob and int32 offsets.
+
+    The arrays may be memory-mapped cache files, in which case every process
+    that opens the same cache entry shares one copy of the pages.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+        # Memoryviews index without creating NumPy scalars, which keeps random
+        # access and binary search cheap
+        self._offset_view = memoryview(np.ascontiguousarray(offsets, dtype=np.int32))
+        self._blob_view = memoryview(np.ascontiguousarray(blob, dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def encoded(self, index):
+        """Return the UTF-8 bytes of the string at index"""
+        return bytes(self._blob_view[self._offset_view[index]:self._offset_view[index + 1]])
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PackedStrings index out of range")
+        return self.encoded(index).decode('utf-8')
+
+    def __iter__(self):
+        data = self.blob.tobytes()
+        bounds = self.offsets.tolist()
+        for i in range(len(bounds) - 1):
+            yield data[bounds[i]:bounds[i + 1]].decode('utf-8')
+
+
+def _write_columns(directory, columns):
+    # Save each column as .npy files and return the manifest entries describing them
+    kinds = {}
+    for name, values in columns.items():
+        if isinstance(values, tuple):
+            codes, categories = values
+            np.save(os.path.join(directory, f"{name}.codes.npy"), np.asarray(codes))
+            kinds[name] = {"kind": "category", "categories": list(categories)}
+        elif isinstance(values, np.ndarray):
+            np.save(os.path.join(directory, f"{name}.npy"), values)
+            kinds[name] = {"kind": "array"}
+        else:
+            if isinstance(values, PackedStrings):
+                offsets, blob = values.offsets, values.blob
+            else:
+                offsets, blob = encode_strings(values)
+            np.save(os.path.join(directory, f"{name}.offsets.npy"), offsets)
+            np.save(os.path.join(directory, f"{name}.blob.npy"), blob)
+            kinds[name] = {"kind": "str"}
+    return kinds
+
+
+def _read_columns(directory, kinds, mmap):
+    mmap_mode = 'r' if mmap else None
+    columns = {}
+    for name, info in kinds.items():
+        if info["kind"] == "category":
+            codes = np.load(os.path.join(directory, f"{name}.codes.npy"), mmap_mode=mmap_mode)
+            columns[name] = (codes, info["categories"])
+        elif info["kind"] == "array":
+            columns[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+        else:
+            offsets = np.load(os.path.join(directory, f"{name}.offsets.npy"), mmap_mode=mmap_mode)
+            blob = np.load(os.path.join(directory, f"{name}.blob.npy"), mmap_mode=mmap_mode)
+            strings = PackedStrings(offsets, blob)
+            columns[name] = strings if mmap else list(strings)
+    return columns
+
+
+def _publish(directory, columns, manifest):
+    """
+    Write columns and their manifest to directory, atomically.
+
+    The files are written to a private directory that is renamed into place,
+    so a concurrent reader never sees a half-written entry.
+    """
+    tmp_dir = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    manifest["columns"] = _write_columns(tmp_dir, columns)
+    _write_json(os.path.join(tmp_dir, MANIFEST_FILE), manifest)
+
+    if os.path.exists(directory):
+        shutil.rmtree(directory, ignore_errors=True)
+    try:
+        os.rename(tmp_dir, directory)
+    except OSError:
+        # Another process published the same entry first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def prune_entries(cache_dir, keep):
+    """
+    Delete every cache entry except the one named keep.
+
+    Processes still serving a deleted entry keep their memory maps; on POSIX
+    the files only disappear once the last mapping is closed.
+    """
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name == keep or '.tmp-' in name:
+            continue
+        if os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def save_columns(cache_dir, paths, columns):
+    """
+    Write lexicon columns to the cache, keyed by the source fingerprint.
+
+    ``columns`` maps names to either a list of strings or PackedStrings ("str"
+    columns, stored as blob + offsets), a ``(codes, categories)`` tuple
+    ("category" columns) or a NumPy array ("array" columns). Entries for
+    older versions of the sources are removed. Returns the fingerprint.
+    """
+    fingerprint, sources = source_fingerprint(paths)
+    os.makedirs(cache_dir, exist_ok=True)
+    _publish(os.path.join(cache_dir, fingerprint), columns,
+             {"version": CACHE_VERSION, "fingerprint": fingerprint})
+    _write_json(os.path.join(cache_dir, SOURCES_FILE), {"fingerprint": fingerprint, "sources": sources})
+    prune_entries(cache_dir, keep=fingerprint)
+    return fingerprint
+
+
+def load_columns(cache_dir, fingerprint, mmap=False):
+    """
+    Read every column of a cache entry.
+
+    With mmap=True the arrays are memory-mapped read-only and string columns are
+    returned as PackedStrings views instead of decoded lists.
+    """
+    entry_dir = os.path.join(cache_dir, fingerprint)
+    manifest = _read_json(os.path.join(entry_dir, MANIFEST_FILE))
+    if not manifest or manifest.get("version") != CACHE_VERSION:
+        return None
+    return _read_columns(entry_dir, manifest["columns"], mmap)
+
+
+class ArtifactStore:
+    """
+    Derived artifacts (syllabified lexicon, indexes, ...) stored in a cache entry.
+
+    Each artifact lives in its own directory with a manifest recording the
+    lexicon fingerprint and the version of the code that built it. A new
+    fingerprint means a new cache entry, and a version bump makes the old
+    copy invisible, so stale artifacts are never read. The app and the CLI
+    share the files through the cache directory.
+    """
+
+    def __init__(self, cache_dir, fingerprint):
+        self.cache_dir = cache_dir
+        self.fingerprint = fingerprint
+        self.root = os.path.join(cache_dir, fingerprint, 'artifacts')
+
+    def _directory(self, name, version):
+        return os.path.join(self.root, f"{name}-v{version}")
+
+    def load(self, name, version, mmap=True):
+        """Return the columns of a current artifact, or None if it is missing or stale"""
+        directory = self._directory(name, version)
+        manifest = _read_json(os.path.join(directory, MANIFEST_FILE))
+        if (not manifest or manifest.get("fingerprint") != self.fingerprint
+                or manifest.get("version") != version or manifest.get("cache_version") != CACHE_VERSION):
+            return None
+        return _read_columns(directory, manifest["columns"], mmap)
+
+    def save(self, name, version, columns):
+        """Store an artifact and drop copies built by other code versions"""
+        os.makedirs(self.root, exist_ok=True)
+        _publish(self._directory(name, version), columns, {
+            "name": name,
+            "version": version,
+            "cache_version": CACHE_VERSION,
+            "fingerprint": self.fingerprint
+        })
+        prefix = f"{name}-v"
+        for entry in os.listdir(self.root):
+            if entry.startswith(prefix) and entry[len(prefix):].isdigit() and entry != f"{name}-v{version}":
+                shutil.rmtree(os.path.join(self.root, entry), ignore_errors=True)
@@ -0,0 +1,231 @@
+## Lexicon loading and the binary lexicon cache, shared by the app and the CLI generators
+import os
+import threading
+from concurrent.futures import as_completed
+
+import numpy as np
+import pandas as pd
+
+import lexicon_cache
+import lexicon_normalize
+import lexicon_sources
+from lexicon_store import LexiconStore, LexiconViews
+
+
+class LexiconLoader:
+    """
+    Loads the primary and secondary lexicons, from their sources or from the
+    binary cache, and writes the cache.
+    
+    Mixed into both GreekPseudowordGenerator classes, so the app and the CLI
+    always read and write the same cache format.
+    """
+    
+    # Columns of the primary lexicon the generator reads
+    LEAN_GREEKLEX_COLUMNS = ["Word", "Pos", "zipfFreq"]
+    
+    # Cache column holding each view of the combined lexicon
+    LEXICON_VIEW_COLUMNS = {"plain": "combined", "nfc": "combined_nfc", "lower": "combined_lower"}
+    
+    def __init__(self):
+        self.lexicons = {}
+        # The combined lexicon keyed by NFC, accent-stripped and lower-cased forms;
+        # combined_lex is the accent-stripped view
+        self.lexicon_views = LexiconViews.empty()
+        self.combined_lex = self.lexicon_views["plain"]
+        # Cache entry the lexicons were loaded from or saved to
+        self.fingerprint = None
+        # Derived artifacts built from the lexicons (see derived_artifact)
+        self.artifacts = None
+        self._derived = {}
+        self._derived_lock = threading.RLock()
+    
+    def load_lexicons(self, greeklex_path, all_num_clean_path=None, cache_dir=lexicon_cache.DEFAULT_CACHE_DIR,
+                      lean=False):
+        """
+        Load lexicons from files, reusing the binary cache while the files are unchanged.
+        
+        With lean=True only the Word/Pos/zipfFreq and spel columns are read, Pos is stored
+        as a categorical, zipfFreq as float32, and the secondary frame is dropped once
+        combined_lex has been built.
+        """
+        source_paths = [greeklex_path, all_num_clean_path]
+        if cache_dir:
+            available_pos = self.load_cached_lexicons(greeklex_path, all_num_clean_path, cache_dir, lean)
+            if available_pos is not None:
+                return available_pos
+        
+        self.fingerprint = None
+        self.artifacts = None
+        self._derived = {}
+        
+        # Load first lexicon
+        try:
+            # The primary lexicon and every sheet of the secondary one are parsed
+            # concurrently in worker processes; either may be Excel, TSV/CSV or
+            # Parquet, and the secondary may also be a plain word list
+            with lexicon_sources.ingest_pool() as pool:
+                print(f"Loading primary lexicon from {greeklex_path}...")
+                primary = pool.submit(lexicon_sources.read_primary_frame, greeklex_path,
+                                      self.LEAN_GREEKLEX_COLUMNS if lean else None)
+                sheets = []
+                # A lexicon missing part of the secondary source must not be
+                # cached under the fingerprint of the complete sources
+                secondary_loaded = not all_num_clean_path
+                if all_num_clean_path:
+                    print(f"Loading secondary lexicon from {all_num_clean_path}...")
+                    try:
+                        sheets = lexicon_sources.submit_secondary(pool, all_num_clean_path, 'spel' if lean else None)
+                    except Exception as e:
+                        print(f"Warning: Could not fully process second lexicon: {e}")
+                
+                self.lexicons["greeklex"] = primary.result()
+                # Convert Word column to string to avoid type issues
+                self.lexicons["greeklex"]["Word"] = self.lexicons["greeklex"]["Word"].astype(str)
+                # Normalize once; the Word column keeps the accent-stripped form
+                words = lexicon_normalize.normalize_words(self.lexicons["greeklex"]["Word"])
+                self.lexicons["greeklex"]["Word"] = words["plain"].to_numpy()
+                
+                # Initialize combined lexicon with first lexicon
+                combined = set(words["nfc"].values)
+                
+                # Load second lexicon if provided
+                spellings = None
+                if sheets:
+                    try:
+                        if lean:
+                            # Stream each sheet's spel values straight into the lexicon
+                            spellings = set()
+                            missing = 0
+                            for future in as_completed(sheets):
+                                values = future.result()
+                                if values is None:
+                                    missing += 1
+                                    continue
+                                spellings.update(values)
+                            if missing == len(sheets):
+                                print("Warning: 'spel' column not found in second lexicon.")
+                            combined.update(spellings)
+                            secondary_loaded = True
+                        else:
+                            dfs = [future.result() for future in sheets]
+                            self.lexicons["all_num_clean"] = pd.concat(dfs, ignore_index=True)
+                            
+                            # Check if 'spel' column exists in second lexicon
+                            if 'spel' in self.lexicons["all_num_clean"].columns:
+                                # Ensure values are strings
+                                self.lexicons["all_num_clean"]["spel"] = self.lexicons["all_num_clean"]["spel"].astype(str)
+                                # Add to combined lexicon
+                                combined.update(self.lexicons["all_num_clean"]["spel"].values)
+                            else:
+                                print("Warning: 'spel' column not found in second lexicon.")
+                                # List columns found in the second lexicon
+                                print(f"Columns found: {list(self.lexicons['all_num_clean'].columns)}")
+                            secondary_loaded = True
+                    except Exception as e:
+                        print(f"Warning: Could not fully process second lexicon: {e}")
+            
+            # Normalize the combined lexicon into each view and pack them into
+            # sorted, immutable stores
+            self.lexicon_views = LexiconViews.from_words(combined)
+            self.combined_lex = self.lexicon_views["plain"]
+            
+            if cache_dir:
+                if secondary_loaded:
+                    self._save_cached_lexicons(cache_dir, source_paths, spellings)
+                else:
+                    print("Warning: Second lexicon did not load completely; the lexicons are not cached")
+            if lean:
+                self._compact_lexicons()
+            
+            return self.get_available_pos()
+        except Exception as e:
+            print(f"Error loading lexicons: {e}")
+            raise
+    
+    def _compact_lexicons(self):
+        """Shrink the loaded frames to the columns and dtypes the generator reads"""
+        greeklex = self.lexicons["greeklex"][self.LEAN_GREEKLEX_COLUMNS]
+        self.lexicons["greeklex"] = pd.DataFrame({
+            "Word": greeklex["Word"],
+            "Pos": greeklex["Pos"].astype("category"),
+            "zipfFreq": pd.to_numeric(greeklex["zipfFreq"], errors="coerce").astype(np.float32)
+        })
+        # combined_lex already holds every spel value
+        self.lexicons.pop("all_num_clean", None)
+    
+    def load_cached_lexicons(self, greeklex_path, all_num_clean_path=None,
+                             cache_dir=lexicon_cache.DEFAULT_CACHE_DIR, lean=False):
+        """
+        Restore the lexicons from the binary cache without touching the Excel files.
+        
+        The cache files are memory-mapped, so processes loading the same entry share
+        its pages. Returns the available parts of speech, or None on a cache miss.
+        """
+        source_paths = [greeklex_path, all_num_clean_path]
+        try:
+            fingerprint = lexicon_cache.cached_fingerprint(cache_dir, source_paths)
+            if not fingerprint:
+                return None
+            columns = lexicon_cache.load_columns(cache_dir, fingerprint, mmap=True)
+            if columns is None:
+                return None
+        except Exception as e:
+            print(f"Warning: Could not read lexicon cache: {e}")
+            return None
+        
+        print(f"Loading lexicons from cache {os.path.join(cache_dir, fingerprint)}...")
+        codes, categories = columns["Pos"]
+        if lean:
+            # Categorical codes use -1 for a missing part of speech as well
+            pos_values = pd.Categorical.from_codes(codes, categories)
+            zipf_values = columns["zipfFreq"].astype(np.float32)
+        else:
+            # Code -1 marks a missing part of speech
+            pos_values = np.array(list(categories) + [np.nan], dtype=object)[codes]
+            zipf_values = columns["zipfFreq"]
+        self.lexicons["greeklex"] = pd.DataFrame({
+            "Word": list(columns["Word"]),
+            "Pos": pos_values,
+            "zipfFreq": zipf_values
+        })
+        if "spel" in columns and not lean:
+            self.lexicons["all_num_clean"] = pd.DataFrame({"spel": list(columns["spel"])})
+        # The stores read the mapped buffers directly; nothing is copied
+        self.lexicon_views = LexiconViews({
+            view: LexiconStore(columns[name].offsets, columns[name].blob)
+            for view, name in self.LEXICON_VIEW_COLUMNS.items()
+        })
+        self.combined_lex = self.lexicon_views["plain"]
+        self.fingerprint = fingerprint
+        self.artifacts = lexicon_cache.ArtifactStore(cache_dir, fingerprint)
+        self._derived = {}
+        return self.get_available_pos()
+    
+    def _save_cached_lexicons(self, cache_dir, source_paths, spellings=None):
+        """Write the loaded lexicons to the binary cache"""
+        try:
+            greeklex = self.lexicons["greeklex"]
+            codes, categories = pd.factorize(greeklex["Pos"])
+            columns = {
+                "Word": greeklex["Word"].tolist(),
+                "Pos": (codes.astype(np.int16), [str(c) for c in categories]),
+                "zipfFreq": pd.to_numeric(greeklex["zipfFreq"], errors="coerce").to_numpy(dtype=np.float64)
+            }
+            for view, name in self.LEXICON_VIEW_COLUMNS.items():
+                columns[name] = self.lexicon_views[view]
+            all_num_clean = self.lexicons.get("all_num_clean")
+            if spellings:
+                columns["spel"] = sorted(spellings)
+            elif all_num_clean is not None and "spel" in all_num_clean.columns:
+                columns["spel"] = all_num_clean["spel"].tolist()
+            fingerprint = lexicon_cache.save_columns(cache_dir, source_paths, columns)
+            self.fingerprint = fingerprint
+            self.artifacts = lexicon_cache.ArtifactStore(cache_dir, fingerprint)
+            print(f"Saved lexicon cache to {os.path.join(cache_dir, fingerprint)}")
+        except Exception as e:
+            print(f"Warning: Could not write lexicon cache: {e}")
+        
+    def get_available_pos(self):
+        """Return available parts of speech in the lexicon"""
+        return np.unique(self.lexicons["greeklex"].Pos.values).tolist()
@@ -0,0 +1,58 @@
+## Unicode normalization of lexicon words into comparable keys
+import unicodedata
+
+import pandas as pd
+
+# Views of the lexicon, from strictest to loosest:
+#   nfc   - the word in NFC form, accents kept
+#   plain - NFC with the accents stripped (diaeresis and breathings are kept)
+#   lower - plain, lower-cased
+VIEWS = ("nfc", "plain", "lower")
+
+# Acute (oxia/tonos), grave (varia) and circumflex (perispomeni), plus the
+# combining tone marks that NFC folds into them
+ACCENT_MARKS = "\u0300\u0301\u0340\u0341\u0342"
+
+
+def _accent_table():
+    # Map every precomposed Greek letter carrying an accent to its NFC form
+    # without the accent, and drop stray combining accents
+    table = {ord(mark): None for mark in ACCENT_MARKS}
+    for start, stop in ((0x0370, 0x0400), (0x1F00, 0x2000)):
+        for code in range(start, stop):
+            ch = chr(code)
+            decomposed = unicodedata.normalize("NFD", ch)
+            if not any(mark in decomposed for mark in ACCENT_MARKS):
+                continue
+            stripped = "".join(c for c in decomposed if c not in ACCENT_MARKS)
+            table[code] = unicodedata.normalize("NFC", stripped)
+    return table
+
+
+# Built once at import; str.translate then strips a word's accents in one pass
+STRIP_ACCENTS = _accent_table()
+
+
+def normalize_word(word, view="plain"):
+    """Return the key of a single word in one view"""
+    if view not in VIEWS:
+        raise ValueError(f"Unknown lexicon view '{view}'; expected one of {', '.join(VIEWS)}")
+    key = unicodedata.normalize("NFC", str(word))
+    if view == "nfc":
+        return key
+    key = key.translate(STRIP_ACCENTS)
+    if view == "plain":
+        return key
+    return key.lower()
+
+
+def normalize_words(words):
+    """
+    Return the keys of many words in every view, as row-aligned Series.
+
+    Each view is derived from the previous one with a vectorized string
+    operation, so every word is normalized once per view.
+    """
+    nfc = pd.Series([str(w) for w in words], dtype=object).str.normalize("NFC")
+    plain = nfc.str.translate(STRIP_ACCENTS)
+    return {"nfc": nfc, "plain": plain, "lower": plain.str.lower()}
@@ -0,0 +1,297 @@
+## Lexicon source readers (Excel, TSV/CSV, Parquet, word lists) and parallel ingest
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import pandas as pd
+
+# Parquet support is optional
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+# Rows per chunk for the streaming readers
+CHUNK_ROWS = 100000
+
+# Source formats by file extension
+FORMATS = {
+    '.xlsx': 'excel',
+    '.xls': 'excel',
+    '.tsv': 'delimited',
+    '.tab': 'delimited',
+    '.csv': 'delimited',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.txt': 'wordlist',
+    '.lst': 'wordlist',
+}
+
+# Pre-converted formats are preferred over Excel when several are present
+PREFERRED_EXTENSIONS = ['.parquet', '.tsv', '.csv', '.txt', '.xlsx', '.xls']
+EXCEL_EXTENSIONS = ['.xlsx', '.xls']
+
+
+class _InlineExecutor:
+    """Executor stand-in that runs each task immediately in the calling process"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def ingest_pool(max_workers=None):
+    """
+    Return an executor for parsing lexicon files in worker processes.
+
+    The Excel readers are pure Python, so only separate processes give a
+    speed-up. A single-threaded caller forks its workers, so they do not
+    re-import the calling script. Forking while other threads run (the app
+    loads in its warm-up and reload threads) can copy locks they hold into
+    the child, so there the workers are spawned instead; a spawned worker
+    imports the calling script as __mp_main__, which must not start any
+    work at import.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers <= 1:
+        return _InlineExecutor()
+    if threading.active_count() == 1 and 'fork' in multiprocessing.get_all_start_methods():
+        method = 'fork'
+    else:
+        method = 'spawn'
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+
+
+def _excel_options(path):
+    # Let xlrd load only the requested sheet of a legacy .xls workbook
+    if str(path).lower().endswith('.xls'):
+        return {"engine_kwargs": {"on_demand": True}}
+    return {}
+
+
+def sheet_names(path):
+    """Return the sheet names of an Excel workbook"""
+    with pd.ExcelFile(path, **_excel_options(path)) as excel_file:
+        return list(excel_file.sheet_names)
+
+
+def read_excel_frame(path, sheet_name=0, columns=None):
+    """Parse one sheet into a DataFrame, optionally restricted to some columns"""
+    return pd.read_excel(path, sheet_name=sheet_name, usecols=columns, **_excel_options(path))
+
+
+def read_sheet_column(path, sheet_name, column):
+    """Return the distinct values of one sheet column as strings, or None if the column is missing"""
+    frame = read_excel_frame(path, sheet_name, lambda name: name == column)
+    if column not in frame.columns:
+        return None
+    return pd.unique(frame[column].astype(str)).tolist()
+
+
+def lexicon_format(path):
+    """Return the source format of a lexicon file from its extension"""
+    extension = os.path.splitext(str(path))[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported lexicon format '{extension}' for {path}")
+    return FORMATS[extension]
+
+
+def find_source(directory, stem, default_extension, report=False):
+    """
+    Return the path of the lexicon called stem in directory.
+
+    A pre-converted TSV, Parquet or word list file is chosen over the Excel
+    original when present and at least as new; a converted copy older than
+    the Excel file is skipped with a warning, since it predates the last
+    update. Otherwise the default path is returned even if it does not
+    exist, so callers can report it as missing. With report=True the choice
+    is printed.
+    """
+    excel = None
+    for extension in EXCEL_EXTENSIONS:
+        path = os.path.join(directory, stem + extension)
+        if os.path.exists(path):
+            excel = path
+            break
+    chosen = None
+    for extension in PREFERRED_EXTENSIONS:
+        path = os.path.join(directory, stem + extension)
+        if extension in EXCEL_EXTENSIONS or not os.path.exists(path):
+            continue
+        if excel and os.path.getmtime(path) < os.path.getmtime(excel):
+            if report:
+                print(f"Warning: {path} is older than {excel}; using the Excel file. "
+                      f"Convert it again to use the faster format.")
+            continue
+        chosen = path
+        break
+    if chosen is None:
+        chosen = excel or os.path.join(directory, stem + default_extension)
+    if report:
+        print(f"Using lexicon source {chosen}")
+    return chosen
+
+
+def _require_pyarrow():
+    if pq is None:
+        raise ImportError("Parquet lexicons need pyarrow. Please install with 'pip install pyarrow'")
+
+
+def _delimiter(path):
+    return ',' if str(path).lower().endswith('.csv') else '\t'
+
+
+def iter_column_chunks(path, column):
+    """
+    Yield one column of a non-Excel source as lists of strings, a chunk at a time.
+
+    Word lists have a single, unnamed column and yield their non-empty lines
+    whatever column is asked for. Yields nothing if the column is missing.
+    """
+    source_format = lexicon_format(path)
+    if source_format == 'delimited':
+        chunks = pd.read_csv(path, sep=_delimiter(path), usecols=lambda name: name == column,
+                             dtype=str, chunksize=CHUNK_ROWS)
+        for chunk in chunks:
+            if column not in chunk.columns:
+                return
+            yield chunk[column].dropna().tolist()
+    elif source_format == 'parquet':
+        _require_pyarrow()
+        parquet_file = pq.ParquetFile(path)
+        if column not in parquet_file.schema_arrow.names:
+            return
+        for batch in parquet_file.iter_batches(batch_size=CHUNK_ROWS, columns=[column]):
+            yield [str(v) for v in batch.column(0).to_pylist() if v is not None]
+    elif source_format == 'wordlist':
+        chunk = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                word = line.strip()
+                if word:
+                    chunk.append(word)
+                if len(chunk) >= CHUNK_ROWS:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+    else:
+        raise ValueError(f"{path} is an Excel workbook; read it sheet by sheet")
+
+
+def read_column_values(path, column):
+    """Return the distinct values of one column of a non-Excel source, or None if it is missing"""
+    values = set()
+    found = False
+    for chunk in iter_column_chunks(path, column):
+        found = True
+        values.update(chunk)
+    if not found and lexicon_format(path) != 'wordlist':
+        return None
+    return list(values)
+
+
+def read_frame(path, columns=None):
+    """Read a lexicon source into a DataFrame, optionally restricted to some columns"""
+    source_format = lexicon_format(path)
+    if source_format == 'excel':
+        return read_excel_frame(path, 0, columns)
+    if source_format == 'delimited':
+        chunks = pd.read_csv(path, sep=_delimiter(path), usecols=columns, chunksize=CHUNK_ROWS)
+        return pd.concat(chunks, ignore_index=True)
+    if source_format == 'parquet':
+        _require_pyarrow()
+        return pd.read_parquet(path, columns=columns)
+    # A word list only has the spelling column
+    words = [word for chunk in iter_column_chunks(path, 'spel') for word in chunk]
+    return pd.DataFrame({"spel": words})
+
+
+def read_primary_frame(path, columns=None):
+    """Read the primary (Word/Pos/zipfFreq) lexicon from any supported format"""
+    if lexicon_format(path) == 'wordlist':
+        raise ValueError(f"{path} is a plain word list; the primary lexicon needs Word, Pos and zipfFreq columns")
+    return read_frame(path, columns)
+
+
+def submit_secondary(pool, path, column=None):
+    """
+    Queue the secondary lexicon on the pool and return its futures.
+
+    Excel workbooks get one task per sheet; other formats are a single
+    streaming task. With column set each task returns that column's distinct
+    values (or None if missing), otherwise a DataFrame.
+    """
+    if lexicon_format(path) == 'excel':
+        return submit_sheets(pool, path, column)
+    if column is None:
+        return [pool.submit(read_frame, path)]
+    return [pool.submit(read_column_values, path, column)]
+
+
+def convert_lexicon(source_path, target_path):
+    """
+    Convert a lexicon (every sheet of a workbook) to another format.
+
+    A word list target keeps only the spel column, or Word if there is none.
+    """
+    if lexicon_format(source_path) == 'excel':
+        frames = [read_excel_frame(source_path, name) for name in sheet_names(source_path)]
+        frame = pd.concat(frames, ignore_index=True)
+    else:
+        frame = read_frame(source_path)
+
+    target_format = lexicon_format(target_path)
+    if target_format == 'delimited':
+        frame.to_csv(target_path, sep=_delimiter(target_path), index=False)
+    elif target_format == 'parquet':
+        _require_pyarrow()
+        # Mixed-type object columns are stored as text
+        for column in frame.columns:
+            if frame[column].dtype == object:
+                frame[column] = frame[column].astype(str)
+        frame.to_parquet(target_path, index=False)
+    elif target_format == 'wordlist':
+        column = 'spel' if 'spel' in frame.columns else 'Word'
+        with open(target_path, 'w', encoding='utf-8') as f:
+            for word in frame[column].dropna().astype(str):
+                f.write(word + '\n')
+    else:
+        raise ValueError("Converting to Excel is not supported")
+    return len(frame)
+
+
+def submit_sheets(pool, path, column=None):
+    """
+    Queue every sheet of a workbook on the pool.
+
+    With column set each task returns that column's distinct values (see
+    read_sheet_column), otherwise the whole sheet DataFrame.
+    """
+    if column is None:
+        return [pool.submit(read_excel_frame, path, name) for name in sheet_names(path)]
+    return [pool.submit(read_sheet_column, path, name, column) for name in sheet_names(path)]
+
+
+# Convert a lexicon once so later loads skip Excel parsing:
+#   python lexicon_sources.py data/all_num_clean_ns.xls data/all_num_clean_ns.parquet
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python lexicon_sources.py SOURCE TARGET")
+        print("Formats: .xlsx/.xls (source only), .tsv, .csv, .parquet, .txt (one word per line)")
+        sys.exit(1)
+    rows = convert_lexicon(sys.argv[1], sys.argv[2])
+    print(f"Converted {rows} rows from {sys.argv[1]} to {sys.argv[2]}")
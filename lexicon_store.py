@@ -0,0 +1,102 @@
+## Packed, immutable lexicon string store
+import random
+
+import numpy as np
+
+import lexicon_normalize
+from lexicon_cache import PackedStrings, encode_strings
+
+
+class LexiconStore(PackedStrings):
+    """
+    Sorted, de-duplicated set of words packed into one UTF-8 buffer.
+
+    Words are ordered by their UTF-8 bytes (the same as code point order), so
+    membership and prefix queries are binary searches over the offset array.
+    Storage is the buffer plus four bytes of offset per word, and a store
+    loaded from memory-mapped cache files is shared between processes.
+    """
+
+    @classmethod
+    def from_words(cls, words):
+        """Build a store from any iterable of words"""
+        offsets, blob = encode_strings(sorted(set(str(w) for w in words)))
+        return cls(offsets, blob)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros(1, dtype=np.int32), np.zeros(0, dtype=np.uint8))
+
+    def _lower_bound(self, key, lo=0, hi=None):
+        # First index whose encoded word is >= key
+        if hi is None:
+            hi = len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.encoded(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def index(self, word):
+        """Return the position of word in the store, or -1 if it is absent"""
+        key = word.encode('utf-8')
+        i = self._lower_bound(key)
+        if i < len(self) and self.encoded(i) == key:
+            return i
+        return -1
+
+    def __contains__(self, word):
+        if not isinstance(word, str):
+            return False
+        return self.index(word) >= 0
+
+    def prefix_range(self, prefix):
+        """Return the (start, stop) index range of words beginning with prefix"""
+        key = prefix.encode('utf-8')
+        start = self._lower_bound(key)
+        # 0xFF never occurs in UTF-8, so it sorts after every continuation
+        stop = self._lower_bound(key + b'\xff', start)
+        return start, stop
+
+    def iter_prefix(self, prefix):
+        """Iterate over the words beginning with prefix, in sorted order"""
+        start, stop = self.prefix_range(prefix)
+        for i in range(start, stop):
+            yield self[i]
+
+    def sample(self, k, rng=random):
+        """Return k distinct random words without copying the lexicon"""
+        return [self[i] for i in rng.sample(range(len(self)), k)]
+
+
+class LexiconViews:
+    """
+    The combined lexicon under each normalization view (see lexicon_normalize).
+
+    Every word is normalized once, when the views are built, and each view is
+    its own LexiconStore of distinct keys; a lookup normalizes only the query.
+    """
+
+    def __init__(self, stores):
+        self.stores = stores
+
+    @classmethod
+    def from_words(cls, words):
+        """Normalize words into every view and pack each view"""
+        keys = lexicon_normalize.normalize_words(list(words))
+        return cls({view: LexiconStore.from_words(keys[view]) for view in lexicon_normalize.VIEWS})
+
+    @classmethod
+    def empty(cls):
+        return cls({view: LexiconStore.empty() for view in lexicon_normalize.VIEWS})
+
+    def __getitem__(self, view):
+        return self.stores[view]
+
+    def contains(self, word, view="plain"):
+        """Return whether word's key in the given view is in the lexicon"""
+        if not isinstance(word, str):
+            return False
+        return lexicon_normalize.normalize_word(word, view) in self.stores[view]
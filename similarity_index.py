@@ -0,0 +1,819 @@
+## Similarity indexes for the lexicon-neighbour test (test 3)
+import bisect
+import hashlib
+import itertools
+import math
+import random
+
+import numpy as np
+
+from lexicon_store import LexiconStore
+
+# Import jellyfish for string comparisons
+try:
+    import jellyfish
+except ImportError:
+    print("Warning: jellyfish module not installed. Please install with 'pip install jellyfish'")
+
+
+def similarity(string1, string2, distance=None):
+    """Return 1 - Levenshtein distance / length of the longer string"""
+    if distance is None:
+        distance = jellyfish.levenshtein_distance(string1, string2)
+    longest = max(len(string1), len(string2))
+    return 1 - distance / longest if longest else 1.0
+
+
+def length_radius(length1, length2, threshold):
+    """
+    Return the largest Levenshtein distance at which a word of length2 can still
+    be more than threshold similar to a word of length1, or None if none can.
+
+    similarity > t means d < (1 - t) * max(l1, l2), and d >= |l1 - l2|, so only
+    lengths with t * l1 < l2 < l1 / t are feasible. A threshold of 0 or less
+    allows any distance (radius -1 stands for unbounded).
+    """
+    if threshold <= 0:
+        return -1
+    # The epsilon keeps float rounding from shrinking the radius
+    radius = math.ceil((1 - threshold) * max(length1, length2) + 1e-9) - 1
+    if radius < abs(length1 - length2):
+        return None
+    return radius
+
+
+class BKTree:
+    """
+    Burkhard-Keller trees over Levenshtein distance, one per word length,
+    stored together as flat arrays.
+
+    Words are grouped by length and each group is its own tree: roots[k] is
+    the root node of the words of length root_lengths[k]. Node i holds
+    words[i]; its children are child_node[child_start[i]:child_start[i + 1]],
+    sorted by their distance child_distance[...] to node i. A range query
+    only visits the trees of feasible lengths, and within a tree only the
+    children whose distance is within the radius of the query's distance to
+    the node.
+    """
+
+    def __init__(self, words, roots, root_lengths, child_start, child_distance, child_node):
+        self.words = words
+        self.roots = roots
+        self.root_lengths = root_lengths
+        self.child_start = child_start
+        self.child_distance = child_distance
+        self.child_node = child_node
+        # Every visited node compares its word, so decode them once
+        self._word_list = list(words)
+        self._buckets = list(zip(root_lengths.tolist(), roots.tolist()))
+        self._start_view = memoryview(np.ascontiguousarray(child_start, dtype=np.int32))
+        self._distance_view = memoryview(np.ascontiguousarray(child_distance, dtype=np.int32))
+        self._node_view = memoryview(np.ascontiguousarray(child_node, dtype=np.int32))
+
+    @classmethod
+    def from_words(cls, words, seed=0):
+        """Build one tree per length over the distinct words, inserted in a fixed shuffled order"""
+        words = sorted(set(str(w) for w in words), key=lambda w: (len(w), w))
+        rng = random.Random(seed)
+        ordered = []
+        roots = []
+        root_lengths = []
+        children = []
+        for length, group in itertools.groupby(words, key=len):
+            group = list(group)
+            # Sorted insertion makes long chains of near-identical words
+            rng.shuffle(group)
+            root = len(ordered)
+            roots.append(root)
+            root_lengths.append(length)
+            ordered.extend(group)
+            children.extend({} for _ in group)
+            for i in range(root + 1, len(ordered)):
+                node = root
+                while True:
+                    distance = jellyfish.levenshtein_distance(ordered[i], ordered[node])
+                    child = children[node].get(distance)
+                    if child is None:
+                        children[node][distance] = i
+                        break
+                    node = child
+
+        child_start = np.zeros(len(ordered) + 1, dtype=np.int32)
+        np.cumsum([len(c) for c in children], out=child_start[1:])
+        child_distance = np.empty(child_start[-1], dtype=np.int32)
+        child_node = np.empty(child_start[-1], dtype=np.int32)
+        for node, edges in enumerate(children):
+            for i, distance in enumerate(sorted(edges), child_start[node]):
+                child_distance[i] = distance
+                child_node[i] = edges[distance]
+        return cls(ordered, np.array(roots, dtype=np.int32), np.array(root_lengths, dtype=np.int32),
+                   child_start, child_distance, child_node)
+
+    @classmethod
+    def from_columns(cls, columns):
+        return cls(columns["words"], columns["roots"], columns["root_lengths"],
+                   columns["child_start"], columns["child_distance"], columns["child_node"])
+
+    def columns(self):
+        """Return the arrays as cache columns"""
+        return {
+            "words": self.words,
+            "roots": self.roots,
+            "root_lengths": self.root_lengths,
+            "child_start": self.child_start,
+            "child_distance": self.child_distance,
+            "child_node": self.child_node
+        }
+
+    def __len__(self):
+        return len(self.child_start) - 1
+
+    def search(self, query, threshold):
+        """
+        Yield (word, distance) for the words that may be more than threshold
+        similar to query: those within the radius feasible for their length.
+        """
+        for length, root in self._buckets:
+            radius = length_radius(len(query), length, threshold)
+            if radius is not None:
+                yield from self._search_tree(root, query, radius)
+
+    def _search_tree(self, root, query, radius):
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            word = self._word_list[node]
+            distance = jellyfish.levenshtein_distance(query, word)
+            if radius < 0 or distance <= radius:
+                yield word, distance
+            start, stop = self._start_view[node], self._start_view[node + 1]
+            if radius >= 0 and start < stop:
+                # Children are sorted by distance, so the ones to visit are a contiguous run
+                start = bisect.bisect_left(self._distance_view, distance - radius, start, stop)
+                stop = bisect.bisect_right(self._distance_view, distance + radius, start, stop)
+            stack.extend(self._node_view[start:stop])
+
+
+class SimilarityIndex:
+    """
+    Exact "is any lexicon word too similar" queries over the whole lexicon.
+
+    A word is too similar when its orthographic similarity, or that of its
+    phonetic form, to some lexicon word is above the threshold - the same rule
+    accept_reject_tests applies - so there is one tree over the words and one
+    over their distinct phonetic forms.
+    """
+
+    def __init__(self, orthographic, phonetic, phonetic_string):
+        self.orthographic = orthographic
+        self.phonetic = phonetic
+        self.phonetic_string = phonetic_string
+
+    @staticmethod
+    def _has_similar(tree, query, threshold):
+        for word, distance in tree.search(query, threshold):
+            if similarity(query, word, distance) > threshold:
+                return True
+        return False
+
+    def any_similar(self, word, threshold, phonetic=None):
+        """
+        Return whether some lexicon word is more than threshold similar to word.
+
+        phonetic is the phonetic form of word, when the caller already has it.
+        """
+        if phonetic is None:
+            phonetic = self.phonetic_string(word)
+        return (self._has_similar(self.orthographic, word, threshold)
+                or self._has_similar(self.phonetic, phonetic, threshold))
+
+
+class EncodedLexicon:
+    """
+    Distinct words grouped by length and stored as integer letter codes.
+
+    Letters are coded 1..len(alphabet). The words of length lengths[k] are
+    the rows of codes[starts[k]:starts[k + 1]] reshaped to (-1, lengths[k]),
+    so every bucket is a dense, unpadded block. Rows are numbered across
+    buckets in that order; those ids key the q-gram postings.
+    """
+
+    def __init__(self, alphabet, lengths, starts, codes):
+        self.alphabet = list(alphabet)
+        self.letter_codes = {ch: i + 1 for i, ch in enumerate(self.alphabet)}
+        self.lengths = lengths
+        self.starts = starts
+        self.codes = codes
+        self._buckets = []
+        self.size = 0
+        for length, start, stop in zip(lengths.tolist(), starts[:-1].tolist(), starts[1:].tolist()):
+            self._buckets.append((length, self.size, start, stop))
+            self.size += (stop - start) // length
+
+    @classmethod
+    def from_words(cls, words):
+        words = sorted(set(str(w) for w in words), key=lambda w: (len(w), w))
+        alphabet = sorted({ch for w in words for ch in w})
+        letter_codes = {ch: i + 1 for i, ch in enumerate(alphabet)}
+        lengths = sorted({len(w) for w in words})
+        starts = np.zeros(len(lengths) + 1, dtype=np.int64)
+        for k, length in enumerate(lengths):
+            starts[k + 1] = starts[k] + length * sum(1 for w in words if len(w) == length)
+        codes = np.fromiter((letter_codes[ch] for w in words for ch in w), dtype=np.int16, count=int(starts[-1]))
+        return cls(alphabet, np.array(lengths, dtype=np.int32), starts, codes)
+
+    @classmethod
+    def from_columns(cls, columns):
+        return cls(columns["alphabet"], columns["lengths"], columns["starts"], columns["codes"])
+
+    def columns(self):
+        """Return the arrays as cache columns"""
+        return {"alphabet": self.alphabet, "lengths": self.lengths, "starts": self.starts, "codes": self.codes}
+
+    def buckets(self):
+        """
+        Yield (length, first, block) for every bucket: block is a (words, length)
+        code array whose rows have ids first, first + 1, ...
+        """
+        for length, first, start, stop in self._buckets:
+            yield length, first, np.asarray(self.codes[start:stop]).reshape(-1, length)
+
+    def decode(self, row):
+        return "".join(self.alphabet[code - 1] for code in row.tolist())
+
+    def encode(self, pattern):
+        """Return the letter codes of pattern; letters outside the alphabet get 0"""
+        return [self.letter_codes.get(ch, 0) for ch in pattern]
+
+    def pattern_masks(self, patterns):
+        """
+        Return the (len(patterns), len(alphabet) + 1) bitmask table of the patterns:
+        bit i of entry [b, c] is set when letter i of pattern b has code c.
+        """
+        peq = np.zeros((len(patterns), len(self.alphabet) + 1), dtype=np.uint64)
+        for b, pattern in enumerate(patterns):
+            for i, ch in enumerate(pattern):
+                code = self.letter_codes.get(ch)
+                # Letters outside the lexicon alphabet match nothing
+                if code is not None:
+                    peq[b, code] |= np.uint64(1 << i)
+        return peq
+
+
+def bit_parallel_distances(peq, pattern_lengths, block):
+    """
+    Return the Levenshtein distances between every pattern and every row of block.
+
+    Myers' bit-parallel algorithm, in Hyyro's formulation for global edit
+    distance: bit i of the vertical and horizontal delta vectors tracks row i
+    of the dynamic-programming column, so each text letter updates a whole
+    column with a handful of 64-bit operations, and NumPy runs them for all
+    (pattern, word) pairs at once. Patterns must be 1 to 64 letters long;
+    peq comes from EncodedLexicon.pattern_masks. Returns a (patterns, rows) array.
+    """
+    one = np.uint64(1)
+    top = (one << (np.asarray(pattern_lengths, dtype=np.uint64) - one))[:, None]
+    shape = (len(pattern_lengths), len(block))
+    pv = np.full(shape, np.iinfo(np.uint64).max, dtype=np.uint64)
+    mv = np.zeros(shape, dtype=np.uint64)
+    score = np.repeat(np.asarray(pattern_lengths, dtype=np.int64)[:, None], len(block), axis=1)
+    for j in range(block.shape[1]):
+        eq = peq[:, block[:, j]]
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        score += (ph & top) != 0
+        score -= (mh & top) != 0
+        # Row 0 of every column is one more than the last (D[0][j] = j)
+        ph = (ph << one) | one
+        mh = mh << one
+        pv = mh | ~(xv | ph)
+        mv = ph & xv
+    return score
+
+
+def banded_distances(pattern, block, budget):
+    """
+    Return the Levenshtein distance between the coded pattern and every row of
+    block, or budget + 1 wherever it exceeds budget.
+
+    Only the diagonal band |i - j| <= budget of the dynamic program can hold
+    values within budget, so each pattern letter computes 2 * budget + 1 cells
+    for all words at once. A word drops out as soon as its whole band row is
+    over budget, since values never decrease along an alignment path; far
+    misses are usually gone after a row or two.
+    """
+    words, length = block.shape
+    over = budget + 1
+    distances = np.full(words, over, dtype=np.int16)
+    if abs(len(pattern) - length) > budget:
+        return distances
+    width = 2 * budget + 1
+    # Words run along the second axis; padding makes the band of pattern
+    # letter i, columns i - budget .. i + budget, the plain slice [i:i + width]
+    letters = np.zeros((length + width + len(pattern), words), dtype=block.dtype)
+    letters[budget + 1:budget + 1 + length] = block.T
+    # Cell o of a band row is column j = i + o - budget; row 0 holds D[0][j] = j
+    row = np.full((width, words), over, dtype=np.int16)
+    for j in range(min(budget, length) + 1):
+        row[budget + j] = j
+    alive = np.arange(words)
+    for i, code in enumerate(pattern, 1):
+        # Diagonal (cell o of the previous row) and vertical (cell o + 1) moves
+        current = (letters[i:i + width] != code).astype(np.int16)
+        current += row
+        np.minimum(current[:-1], row[1:] + 1, out=current[:-1])
+        # Cells left of column 0 or right of the last column are outside the matrix
+        current[:max(budget - i, 0)] = over
+        current[max(length - i + budget + 1, 0):] = over
+        if i <= budget:
+            current[budget - i] = i
+        # Horizontal moves, left to right
+        for o in range(1, width):
+            np.minimum(current[o], current[o - 1] + 1, out=current[o])
+        row = current
+        keep = row.min(axis=0) <= budget
+        if not keep.all():
+            alive = alive[keep]
+            if not len(alive):
+                return distances
+            row = row[:, keep]
+            letters = letters[:, keep]
+    distances[alive] = np.minimum(row[length - len(pattern) + budget], over)
+    return distances
+
+
+class QGramIndex:
+    """
+    Inverted index from the q-grams of an EncodedLexicon's words to their row ids.
+
+    Words are padded with q - 1 boundary markers on each side, so a word of
+    length n has n + q - 1 q-grams, and a q-gram is keyed by its letter codes
+    read as digits in base len(alphabet) + 2. The words holding gram keys[g]
+    are word_ids[posting_start[g]:posting_start[g + 1]], with the number of
+    times it occurs in each in occurrences[...].
+    """
+
+    Q = 2
+
+    def __init__(self, lexicon, keys, posting_start, word_ids, occurrences):
+        self.lexicon = lexicon
+        self.keys = keys
+        self.posting_start = posting_start
+        self.word_ids = word_ids
+        self.occurrences = occurrences
+        self.radix = len(lexicon.alphabet) + 2
+
+    def gram_keys(self, codes):
+        """Return the keys of the padded q-grams of rows of codes, one row per word"""
+        codes = np.atleast_2d(codes)
+        marker = self.radix - 1
+        padded = np.full((len(codes), codes.shape[1] + 2 * (self.Q - 1)), marker, dtype=np.int64)
+        padded[:, self.Q - 1:self.Q - 1 + codes.shape[1]] = codes
+        grams = codes.shape[1] + self.Q - 1
+        keys = np.zeros((len(codes), grams), dtype=np.int64)
+        for i in range(self.Q):
+            keys = keys * self.radix + padded[:, i:i + grams]
+        return keys
+
+    @classmethod
+    def from_lexicon(cls, lexicon):
+        index = cls(lexicon, None, None, None, None)
+        # One (gram, word) pair per q-gram occurrence, folded into a single sortable key
+        pairs = np.concatenate([
+            (index.gram_keys(block) * lexicon.size + np.arange(first, first + len(block))[:, None]).ravel()
+            for length, first, block in lexicon.buckets()])
+        pairs, occurrences = np.unique(pairs, return_counts=True)
+        grams = pairs // lexicon.size
+        keys, posting_start = np.unique(grams, return_index=True)
+        index.keys = keys
+        index.posting_start = np.append(posting_start, len(pairs)).astype(np.int64)
+        index.word_ids = (pairs % lexicon.size).astype(np.int32)
+        index.occurrences = occurrences.astype(np.int16)
+        return index
+
+    @classmethod
+    def from_columns(cls, lexicon, columns):
+        return cls(lexicon, columns["keys"], columns["posting_start"], columns["word_ids"], columns["occurrences"])
+
+    def columns(self):
+        """Return the arrays as cache columns"""
+        return {
+            "keys": self.keys,
+            "posting_start": self.posting_start,
+            "word_ids": self.word_ids,
+            "occurrences": self.occurrences
+        }
+
+    def shared_counts(self, codes):
+        """
+        Return, for every word id, the number of q-grams the coded pattern
+        shares with that word, counting repeated q-grams as a multiset.
+        """
+        keys, counts = np.unique(self.gram_keys(np.asarray(codes, dtype=np.int64)), return_counts=True)
+        slots = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = self.keys[slots] == keys
+        ids = []
+        shared = []
+        for slot, count in zip(slots[found].tolist(), counts[found].tolist()):
+            start, stop = self.posting_start[slot], self.posting_start[slot + 1]
+            ids.append(self.word_ids[start:stop])
+            shared.append(np.minimum(self.occurrences[start:stop], count))
+        if not ids:
+            return np.zeros(self.lexicon.size, dtype=np.int64)
+        return np.bincount(np.concatenate(ids), weights=np.concatenate(shared),
+                           minlength=self.lexicon.size).astype(np.int64)
+
+    @classmethod
+    def min_shared(cls, length1, length2, radius):
+        """
+        Return the fewest q-grams two words of these lengths share when their
+        edit distance is at most radius: each edit destroys at most q of the
+        max(length1, length2) + q - 1 padded q-grams (the count lemma).
+        """
+        return max(length1, length2) + cls.Q - 1 - radius * cls.Q
+
+
+class BitParallelIndex:
+    """
+    Exact test-3 queries that score every lexicon word of a feasible length
+    with the bit-parallel kernel, orthographic and phonetic forms together.
+
+    With q-gram indexes, any_similar first counts the q-grams each word
+    shares with the query and only verifies the words the count lemma lets
+    through.
+    """
+
+    # Longest pattern the 64-bit kernel handles; longer ones use jellyfish
+    MAX_PATTERN = 64
+
+    def __init__(self, orthographic, phonetic, phonetic_string, qgrams=None):
+        self.orthographic = orthographic
+        self.phonetic = phonetic
+        self.phonetic_string = phonetic_string
+        # Optional (orthographic, phonetic) QGramIndex pair used as a pre-filter
+        self.qgrams = qgrams or (None, None)
+
+    def _scan_similar(self, lexicon, pattern, threshold):
+        # Patterns the 64-bit kernel cannot take are scored with jellyfish
+        for length, _, block in lexicon.buckets():
+            if length_radius(len(pattern), length, threshold) is None:
+                continue
+            if any(similarity(pattern, lexicon.decode(row)) > threshold for row in block):
+                return True
+        return False
+
+    def _similar_in(self, lexicon, qgrams, pattern, threshold):
+        if not 0 < len(pattern) <= self.MAX_PATTERN:
+            return self._scan_similar(lexicon, pattern, threshold)
+        codes = lexicon.encode(pattern)
+        peq = lexicon.pattern_masks([pattern])
+        pattern_lengths = np.array([len(pattern)], dtype=np.int64)
+        shared = None
+        # Words of about the same length are the likeliest neighbours, so score them first
+        buckets = sorted(lexicon.buckets(), key=lambda bucket: abs(bucket[0] - len(pattern)))
+        for length, first, block in buckets:
+            radius = length_radius(len(pattern), length, threshold)
+            if radius is None:
+                continue
+            if qgrams is not None and radius >= 0 and qgrams.min_shared(len(pattern), length, radius) > 0:
+                # Only words sharing enough q-grams can be within the radius
+                if shared is None:
+                    shared = qgrams.shared_counts(codes)
+                rows = np.flatnonzero(shared[first:first + len(block)]
+                                      >= qgrams.min_shared(len(pattern), length, radius))
+                if not len(rows):
+                    continue
+                block = block[rows]
+            if 0 <= radius and 3 * (2 * radius + 1) <= length:
+                # A band a third of the word wide or less, with early exit,
+                # beats scoring whole columns
+                distances = banded_distances(codes, block, radius)
+            else:
+                distances = bit_parallel_distances(peq, pattern_lengths, block)
+            # The radius can admit a distance exactly at the threshold, so compare similarities
+            if (1 - distances / max(len(pattern), length)).max() > threshold:
+                return True
+        return False
+
+    def any_similar(self, word, threshold, phonetic=None):
+        """
+        Return whether some lexicon word is more than threshold similar to word.
+
+        phonetic is the phonetic form of word, when the caller already has it.
+        """
+        if not isinstance(word, str):
+            word = str(word)
+        if phonetic is None:
+            phonetic = self.phonetic_string(word)
+        return (self._similar_in(self.orthographic, self.qgrams[0], word, threshold)
+                or self._similar_in(self.phonetic, self.qgrams[1], phonetic, threshold))
+
+
+def stable_hash(string):
+    """Return a 64-bit hash of string that is the same in every process and run"""
+    return int.from_bytes(hashlib.blake2b(string.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def deletion_variants(word, max_deletions):
+    """Return {variant: fewest deletions producing it} for up to max_deletions deletions"""
+    variants = {word: 0}
+    frontier = {word}
+    for depth in range(1, max_deletions + 1):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        for variant in frontier:
+            variants.setdefault(variant, depth)
+    return variants
+
+
+class DeletionIndex:
+    """
+    Deletion neighbourhoods (SymSpell) of a word list, stored as flat arrays.
+
+    Two words within edit distance k share a string reachable from each by at
+    most k deletions. Every variant of every word up to max_deletions
+    deletions is hashed with stable_hash; hashes is sorted, and entry i
+    says word_ids[i] reaches that hash with depths[i] deletions. A query
+    looks up the hashes of its own variants, so candidates cost a binary
+    search each instead of a pass over the lexicon.
+    """
+
+    MAX_DELETIONS = 2
+
+    def __init__(self, words, hashes, word_ids, depths):
+        self.words = words
+        self.hashes = hashes
+        self.word_ids = word_ids
+        self.depths = depths
+        self.max_deletions = int(depths.max()) if len(depths) else 0
+
+    @classmethod
+    def from_words(cls, words, max_deletions=MAX_DELETIONS):
+        words = sorted(set(str(w) for w in words))
+        hashes = []
+        word_ids = []
+        depths = []
+        for word_id, word in enumerate(words):
+            for variant, depth in deletion_variants(word, max_deletions).items():
+                hashes.append(stable_hash(variant))
+                word_ids.append(word_id)
+                depths.append(depth)
+        hashes = np.array(hashes, dtype=np.uint64)
+        order = np.argsort(hashes, kind="stable")
+        return cls(words, hashes[order], np.array(word_ids, dtype=np.int32)[order],
+                   np.array(depths, dtype=np.int8)[order])
+
+    @classmethod
+    def from_columns(cls, columns):
+        return cls(columns["words"], columns["hashes"], columns["word_ids"], columns["depths"])
+
+    def columns(self):
+        """Return the arrays as cache columns"""
+        return {"words": self.words, "hashes": self.hashes, "word_ids": self.word_ids, "depths": self.depths}
+
+    def candidates(self, word, radius):
+        """Return the words that may be within radius edits of word (a superset of them)"""
+        keys = np.array([stable_hash(v) for v in deletion_variants(word, radius)], dtype=np.uint64)
+        lows = np.searchsorted(self.hashes, keys, side="left")
+        highs = np.searchsorted(self.hashes, keys, side="right")
+        found = set()
+        for low, high in zip(lows.tolist(), highs.tolist()):
+            if low < high:
+                found.update(self.word_ids[low:high][self.depths[low:high] <= radius].tolist())
+        return [self.words[i] for i in found]
+
+
+class SymSpellIndex:
+    """
+    Test-3 queries answered from the deletion indexes of the lexicon and its
+    phonetic forms. Radii beyond the indexed depth are handed to a fallback
+    index, so the answer stays exact.
+    """
+
+    def __init__(self, orthographic, phonetic, phonetic_string, fallback):
+        self.orthographic = orthographic
+        self.phonetic = phonetic
+        self.phonetic_string = phonetic_string
+        self.fallback = fallback
+
+    @staticmethod
+    def _max_radius(length, threshold):
+        # Largest radius over every feasible lexicon length (-1 means unbounded)
+        if threshold <= 0:
+            return -1
+        radii = [length_radius(length, other, threshold) for other in range(1, int(length / threshold) + 2)]
+        return max((r for r in radii if r is not None), default=0)
+
+    def _similar_in(self, index, pattern, threshold):
+        # Returns True, False, or None when part of the radius is beyond the index
+        radius = self._max_radius(len(pattern), threshold)
+        covered = 0 <= radius <= index.max_deletions
+        depth = radius if covered else index.max_deletions
+        if any(similarity(pattern, w) > threshold for w in index.candidates(pattern, depth)):
+            return True
+        return False if covered else None
+
+    def any_similar(self, word, threshold, phonetic=None):
+        """
+        Return whether some lexicon word is more than threshold similar to word.
+
+        phonetic is the phonetic form of word, when the caller already has it.
+        """
+        if not isinstance(word, str):
+            word = str(word)
+        if phonetic is None:
+            phonetic = self.phonetic_string(word)
+        orthographic_found = self._similar_in(self.orthographic, word, threshold)
+        if orthographic_found:
+            return True
+        phonetic_found = self._similar_in(self.phonetic, phonetic, threshold)
+        if phonetic_found:
+            return True
+        if orthographic_found is None or phonetic_found is None:
+            return self.fallback.any_similar(word, threshold, phonetic)
+        return False
+
+
+class PhoneticKeyIndex:
+    """
+    Lexicon words grouped by phonetic key (see phonetic_string).
+
+    keys is a LexiconStore of the distinct keys, so finding a key is one
+    binary search. The lexicon words with key keys[k] are
+    words[word_ids[key_start[k]:key_start[k + 1]]].
+    """
+
+    def __init__(self, words, keys, key_start, word_ids):
+        self.words = words
+        self.keys = keys
+        self.key_start = key_start
+        self.word_ids = word_ids
+
+    @classmethod
+    def from_forms(cls, words, forms):
+        """Build the index from words and their row-aligned phonetic forms"""
+        keys, inverse = np.unique(np.array([str(f) for f in forms], dtype=object), return_inverse=True)
+        word_ids = np.argsort(inverse, kind="stable").astype(np.int32)
+        key_start = np.searchsorted(inverse[word_ids], np.arange(len(keys) + 1)).astype(np.int32)
+        return cls(words, LexiconStore.from_words(keys.tolist()), key_start, word_ids)
+
+    @classmethod
+    def from_columns(cls, words, columns):
+        keys = columns["keys"]
+        return cls(words, LexiconStore(keys.offsets, keys.blob), columns["key_start"], columns["word_ids"])
+
+    def columns(self):
+        """Return the arrays as cache columns"""
+        return {"keys": self.keys, "key_start": self.key_start, "word_ids": self.word_ids}
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def homophones(self, key):
+        """Return the lexicon words whose phonetic form is key"""
+        k = self.keys.index(key)
+        if k < 0:
+            return []
+        return [self.words[i] for i in self.word_ids[self.key_start[k]:self.key_start[k + 1]].tolist()]
+
+
+class LexiconTrie:
+    """
+    Trie of a word list, stored as flat arrays in breadth-first order.
+
+    The children of node s are edge_target[edge_start[s]:edge_start[s + 1]],
+    reached on the letter codes edge_code[...]; node 0 is the root and
+    terminal[s] marks nodes where a word ends. Letters are coded
+    1..len(alphabet); any other character has code 0 and never matches.
+    """
+
+    def __init__(self, alphabet, edge_start, edge_code, edge_target, terminal):
+        self.alphabet = list(alphabet)
+        self.letter_codes = {ch: i + 1 for i, ch in enumerate(self.alphabet)}
+        self.edge_start = edge_start
+        self.edge_code = edge_code
+        self.edge_target = edge_target
+        self.terminal = terminal
+
+    @classmethod
+    def from_words(cls, words):
+        words = sorted(set(str(w) for w in words))
+        alphabet = sorted({ch for w in words for ch in w})
+        letter_codes = {ch: i + 1 for i, ch in enumerate(alphabet)}
+        children = [{}]
+        ends = [False]
+        for word in words:
+            node = 0
+            for ch in word:
+                code = letter_codes[ch]
+                child = children[node].get(code)
+                if child is None:
+                    child = children[node][code] = len(children)
+                    children.append({})
+                    ends.append(False)
+                node = child
+            ends[node] = True
+        # Renumber breadth-first so each level is a contiguous range of nodes
+        order = [0]
+        for node in order:
+            order.extend(children[node][code] for code in sorted(children[node]))
+        renumber = np.empty(len(order), dtype=np.int32)
+        renumber[order] = np.arange(len(order), dtype=np.int32)
+        edge_start = np.zeros(len(order) + 1, dtype=np.int32)
+        np.cumsum([len(children[node]) for node in order], out=edge_start[1:])
+        edge_code = np.fromiter((code for node in order for code in sorted(children[node])),
+                                dtype=np.int16, count=int(edge_start[-1]))
+        edge_target = np.fromiter((renumber[children[node][code]] for node in order for code in sorted(children[node])),
+                                  dtype=np.int32, count=int(edge_start[-1]))
+        terminal = np.array([ends[node] for node in order], dtype=bool)
+        return cls(alphabet, edge_start, edge_code, edge_target, terminal)
+
+    @classmethod
+    def from_columns(cls, columns):
+        return cls(columns["alphabet"], columns["edge_start"], columns["edge_code"],
+                   columns["edge_target"], columns["terminal"])
+
+    def columns(self):
+        """Return the arrays as cache columns"""
+        return {
+            "alphabet": self.alphabet,
+            "edge_start": self.edge_start,
+            "edge_code": self.edge_code,
+            "edge_target": self.edge_target,
+            "terminal": self.terminal
+        }
+
+    def any_similar(self, pattern, threshold):
+        """
+        Return whether some word is more than threshold similar to pattern.
+
+        The walk runs the Levenshtein automaton of pattern over the trie one
+        level at a time: every live node carries its dynamic-programming row,
+        and all children of the level are advanced together. Row values never
+        decrease along a path, so a subtree is pruned as soon as its row
+        minimum exceeds the largest radius any longer word could still have.
+        """
+        size = len(pattern)
+        codes = np.array([self.letter_codes.get(ch, 0) for ch in pattern], dtype=np.int16)
+        if threshold > 0:
+            longest = int(size / threshold) + 1
+            radii = [length_radius(size, length, threshold) for length in range(longest + 1)]
+        else:
+            longest = None
+            radii = None
+        nodes = np.zeros(1, dtype=np.int32)
+        # Column s of rows is the row of nodes[s]; the root's row is 0..size
+        rows = np.arange(size + 1, dtype=np.int16)[:, None]
+        depth = 0
+        while len(nodes) and (longest is None or depth < longest):
+            depth += 1
+            # Expand every live node into its children
+            starts = self.edge_start[nodes]
+            counts = self.edge_start[nodes + 1] - starts
+            parents = np.repeat(np.arange(len(nodes)), counts)
+            edges = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+            letters = self.edge_code[edges]
+            previous = rows[:, parents]
+            current = np.empty_like(previous)
+            current[0] = depth
+            np.minimum(previous[1:] + 1, previous[:-1] + (codes[:, None] != letters), out=current[1:])
+            # Insertions into the pattern, left to right
+            for j in range(1, size + 1):
+                np.minimum(current[j], current[j - 1] + 1, out=current[j])
+            nodes = self.edge_target[edges]
+            # Words ending here are scored exactly
+            ends = self.terminal[nodes]
+            if ends.any() and (radii is None or radii[depth] is not None):
+                distances = current[size, ends]
+                if (1 - distances / max(size, depth)).max() > threshold:
+                    return True
+            if radii is not None:
+                budget = max((r for r in radii[depth + 1:] if r is not None), default=-1)
+                keep = current.min(axis=0) <= budget
+                nodes = nodes[keep]
+                current = current[:, keep]
+            rows = current
+        return False
+
+
+class TrieIndex:
+    """Exact test-3 queries walked over the tries of the lexicon and its phonetic forms"""
+
+    def __init__(self, orthographic, phonetic, phonetic_string):
+        self.orthographic = orthographic
+        self.phonetic = phonetic
+        self.phonetic_string = phonetic_string
+
+    def any_similar(self, word, threshold, phonetic=None):
+        """
+        Return whether some lexicon word is more than threshold similar to word.
+
+        phonetic is the phonetic form of word, when the caller already has it.
+        """
+        if not isinstance(word, str):
+            word = str(word)
+        if phonetic is None:
+            phonetic = self.phonetic_string(word)
+        return (self.orthographic.any_similar(word, threshold)
+                or self.phonetic.any_similar(phonetic, threshold))
@@ -0,0 +1,157 @@
+## Suffix automaton answering substring queries over the whole lexicon
+import numpy as np
+
+
+class SubstringIndex:
+    """
+    Generalized suffix automaton of a word list, stored as flat arrays.
+
+    Every substring of every word is spelled by a path from state 0, so
+    "is this substring attested" takes one transition per character. The
+    transitions are kept in CSR form: the edges of state s are
+    edge_code/edge_target[edge_start[s]:edge_start[s + 1]], sorted by code.
+    Letters are coded 1..len(alphabet); any other character has code 0 and
+    never matches. The arrays can be memory-mapped from the lexicon cache.
+    """
+
+    def __init__(self, alphabet, edge_start, edge_code, edge_target, link, length):
+        self.alphabet = list(alphabet)
+        self.codes = {ch: i + 1 for i, ch in enumerate(self.alphabet)}
+        self.edge_start = edge_start
+        self.edge_code = edge_code
+        self.edge_target = edge_target
+        self.link = link
+        self.length = length
+        # Memoryviews index without creating NumPy scalars, like PackedStrings
+        self._start_view = memoryview(np.ascontiguousarray(edge_start, dtype=np.int32))
+        self._code_view = memoryview(np.ascontiguousarray(edge_code, dtype=np.int16))
+        self._target_view = memoryview(np.ascontiguousarray(edge_target, dtype=np.int32))
+        self._link_view = memoryview(np.ascontiguousarray(link, dtype=np.int32))
+        self._length_view = memoryview(np.ascontiguousarray(length, dtype=np.int32))
+
+    @classmethod
+    def from_words(cls, words):
+        """Build the automaton of every word, one word at a time"""
+        words = [str(w) for w in words]
+        alphabet = sorted({ch for w in words for ch in w})
+        codes = {ch: i + 1 for i, ch in enumerate(alphabet)}
+        link = [-1]
+        length = [0]
+        trans = [{}]
+
+        def split(p, q, code):
+            # Clone q so the path through p keeps the shorter length
+            clone = len(length)
+            length.append(length[p] + 1)
+            link.append(link[q])
+            trans.append(trans[q].copy())
+            while p != -1 and trans[p].get(code) == q:
+                trans[p][code] = clone
+                p = link[p]
+            link[q] = clone
+            return clone
+
+        def extend(last, code):
+            if code in trans[last]:
+                # The prefix is already a substring of an earlier word
+                q = trans[last][code]
+                return q if length[last] + 1 == length[q] else split(last, q, code)
+            cur = len(length)
+            length.append(length[last] + 1)
+            link.append(0)
+            trans.append({})
+            p = last
+            while p != -1 and code not in trans[p]:
+                trans[p][code] = cur
+                p = link[p]
+            if p != -1:
+                q = trans[p][code]
+                link[cur] = q if length[p] + 1 == length[q] else split(p, q, code)
+            return cur
+
+        for word in words:
+            last = 0
+            for ch in word:
+                last = extend(last, codes[ch])
+
+        edge_start = np.zeros(len(trans) + 1, dtype=np.int32)
+        np.cumsum([len(t) for t in trans], out=edge_start[1:])
+        edge_code = np.empty(edge_start[-1], dtype=np.int16)
+        edge_target = np.empty(edge_start[-1], dtype=np.int32)
+        for state, edges in enumerate(trans):
+            for i, code in enumerate(sorted(edges), edge_start[state]):
+                edge_code[i] = code
+                edge_target[i] = edges[code]
+        return cls(alphabet, edge_start, edge_code, edge_target,
+                   np.array(link, dtype=np.int32), np.array(length, dtype=np.int32))
+
+    @classmethod
+    def from_columns(cls, columns):
+        return cls(columns["alphabet"], columns["edge_start"], columns["edge_code"],
+                   columns["edge_target"], columns["link"], columns["length"])
+
+    def columns(self):
+        """Return the arrays as cache columns"""
+        return {
+            "alphabet": self.alphabet,
+            "edge_start": self.edge_start,
+            "edge_code": self.edge_code,
+            "edge_target": self.edge_target,
+            "link": self.link,
+            "length": self.length
+        }
+
+    def __len__(self):
+        return len(self.length)
+
+    def _step(self, state, code):
+        # Target of the transition on code, or -1
+        for i in range(self._start_view[state], self._start_view[state + 1]):
+            if self._code_view[i] == code:
+                return self._target_view[i]
+        return -1
+
+    def __contains__(self, substring):
+        if not isinstance(substring, str):
+            return False
+        state = 0
+        for ch in substring:
+            state = self._step(state, self.codes.get(ch, 0))
+            if state < 0:
+                return False
+        return True
+
+    def match_lengths(self, word):
+        """
+        Return, for each position of word, the length of the longest attested
+        substring ending there (its matching statistics), in one pass.
+        """
+        lengths = []
+        state = 0
+        matched = 0
+        for ch in word:
+            code = self.codes.get(ch, 0)
+            target = self._step(state, code)
+            # Fall back along suffix links to the longest suffix that can be extended
+            while target < 0 and state != 0:
+                state = self._link_view[state]
+                matched = self._length_view[state]
+                target = self._step(state, code)
+            if target < 0:
+                state = 0
+                matched = 0
+            else:
+                state = target
+                matched += 1
+            lengths.append(matched)
+        return lengths
+
+    def all_attested(self, word, order):
+        """
+        Return whether every substring of word up to the given length is attested.
+
+        Position i ends substrings of up to i + 1 letters, so a word shorter
+        than order must be attested as a whole.
+        """
+        lengths = self.match_lengths(word)
+        return all(matched >= min(order, i + 1) for i, matched in enumerate(lengths))
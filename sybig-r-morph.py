@@ -1,9 +1,11 @@
-import itertools
 import numpy as np
 import os
-import pandas as pd
 import random
 
+import lexicon_sources
+from lexicon_artifacts import DerivedArtifacts
+from lexicon_loader import LexiconLoader
+
 # Import jellyfish for string comparisons
 try:
     import jellyfish
@@ -79,103 +81,20 @@ def add_random_stress(word, part_of_speech="All"):
     
     return ''.join(sylls)
 
-class GreekPseudowordGenerator:
+class GreekPseudowordGenerator(LexiconLoader, DerivedArtifacts):
     def __init__(self):
-        self.lexicons = {}
-        self.combined_lex = set()
+        super().__init__()
         # Define function to remove oxia
         try:
             self.remove_oxia = remove_diacritic("\u0301")
         except NameError:
             # Fallback if greek_accentuation isn't available
             self.remove_oxia = lambda s: s
-        
-    def load_lexicons(self, greeklex_path, all_num_clean_path=None):
-        """Load lexicons from files"""
-        # Load first lexicon
+        # Syllabifier of this entry point, used by syllabified_lexicon
         try:
-            print(f"Loading primary lexicon from {greeklex_path}...")
-            self.lexicons["greeklex"] = pd.read_excel(greeklex_path)
-            # Convert Word column to string to avoid type issues
-            self.lexicons["greeklex"]["Word"] = self.lexicons["greeklex"]["Word"].astype(str)
-            self.lexicons["greeklex"]["Word"] = self.lexicons["greeklex"]["Word"].apply(self.remove_oxia)
-            
-            # Initialize combined lexicon with first lexicon
-            self.combined_lex = set(self.lexicons["greeklex"]["Word"].values)
-            
-            # Load second lexicon if provided
-            if all_num_clean_path:
-                print(f"Loading secondary lexicon from {all_num_clean_path}...")
-                try:
-                    excel_file = pd.ExcelFile(all_num_clean_path)
-                    dfs = []
-                    for sheet_name in excel_file.sheet_names:
-                        dftemp = excel_file.parse(sheet_name)
-                        dfs.append(dftemp)
-                    self.lexicons["all_num_clean"] = pd.concat(dfs, ignore_index=True)
-                    
-                    # Check if 'spel' column exists in second lexicon
-                    if 'spel' in self.lexicons["all_num_clean"].columns:
-                        # Ensure values are strings
-                        self.lexicons["all_num_clean"]["spel"] = self.lexicons["all_num_clean"]["spel"].astype(str)
-                        # Add to combined lexicon
-                        self.combined_lex.update(set(self.lexicons["all_num_clean"]["spel"].values))
-                    else:
-                        print("Warning: 'spel' column not found in second lexicon.")
-                        # List columns found in the second lexicon
-                        print(f"Columns found: {list(self.lexicons['all_num_clean'].columns)}")
-                except Exception as e:
-                    print(f"Warning: Could not fully process second lexicon: {e}")
-            
-            return self.get_available_pos()
-        except Exception as e:
-            print(f"Error loading lexicons: {e}")
-            raise
-        
-    def get_available_pos(self):
-        """Return available parts of speech in the lexicon"""
-        return np.unique(self.lexicons["greeklex"].Pos.values).tolist()
-    
-    def phonetic_string(self, input_string):
-        """Convert string to phonetic representation"""
-        if not isinstance(input_string, str):
-            input_string = str(input_string)
-            
-        substitutions = {
-            "αι": "ε",
-            "ει": "ι",
-            "οι": "ι",
-            "υι": "ι",
-            "ω": "ο",
-            "η": "ι",
-            "υ": "ι"
-        }
-        output_string = input_string
-        for pattern, replacement in substitutions.items():
-            output_string = output_string.replace(pattern, replacement)
-        return output_string
-    
-    def max_consecutively_repeated_letters(self, string):
-        """Count maximum consecutively repeated letters"""
-        if not isinstance(string, str):
-            string = str(string)
-            
-        max_count = 0
-        current_count = 0
-        previous_letter = None
-
-        for letter in string:
-            if letter.isalpha():
-                letter = letter.lower()
-                if letter == previous_letter:
-                    current_count += 1
-                else:
-                    current_count = 1
-                    previous_letter = letter
-
-                if current_count > max_count:
-                    max_count = current_count
-        return max_count
+            self.syllabify = syllabify
+        except NameError:
+            self.syllabify = None
     
     def calculate_similarity(self, string1, string2):
         """Calculate similarity between two strings"""
@@ -189,66 +108,22 @@ class GreekPseudowordGenerator:
         similarity_ratio = 1 - (levenshtein_distance / max(len(string1), len(string2)))
         return similarity_ratio
     
-    def generate_ngrams(self, text):
-        """Generate n-grams from text"""
-        if not isinstance(text, str):
-            text = str(text)
-            
-        ngrams_2 = [text[i:i+2] for i in range(len(text)-1)]
-        ngrams_3 = [text[i:i+3] for i in range(len(text)-2)]
-        return ngrams_2, ngrams_3
-    
-    def search_ngrams_in_lexicon(self, ngrams_2, ngrams_3):
-        """Search n-grams in lexicon"""
-        for ngram in ngrams_2 + ngrams_3:
-            found = False
-            for word in self.combined_lex:
-                if ngram in word:
-                    found = True
-                    break
-            if not found:
-                return False
-        return True
-    
-    def accept_reject_tests(self, string1, simthreshold=0.5):
-        """Apply tests to accept or reject pseudowords"""
-        # Ensure input is a string
-        if not isinstance(string1, str):
-            string1 = str(string1)
-            
-        # Test 1: Reject if the word exists in the lexicon
-        if string1 in self.combined_lex:
-            return False
-        
-        # Test 2: Reject if there are consecutively repeated letters
-        if self.max_consecutively_repeated_letters(string1) > 1:
-            return False
-        
-        # Test 3: Check similarity and phonetic_similarity
-        # For performance, sample a subset of the lexicon
-        lexicon_sample = random.sample(list(self.combined_lex), min(1000, len(self.combined_lex)))
-        for string2 in lexicon_sample:
-            similarity_ratio = self.calculate_similarity(string1, string2)
-            phonetic_similarity_ratio = self.calculate_similarity(
-                self.phonetic_string(string1), self.phonetic_string(string2))
-            check_ratio = max(similarity_ratio, phonetic_similarity_ratio)
-            if check_ratio > simthreshold:
-                return False
-                
-        # Test 4: Check if all n-grams exist in the lexicon
-        ngrams_2, ngrams_3 = self.generate_ngrams(string1)
-        test = self.search_ngrams_in_lexicon(ngrams_2, ngrams_3)
-        if not test:
-            return False
-
-        return True
-
-    def get_balanced_syllable_samples(self, syldict, num_samples=100):
+    def get_balanced_syllable_samples(self, syldict, num_samples=100, junctions=None):
         """
         Create a balanced sample of syllable combinations to ensure variety in first syllables
+        
+        With junctions (see junction_matrices) each next syllable is drawn only from
+        those that may legally follow the previous one.
         """
         balanced_samples = []
         
+        # Legal followers of each syllable, worked out once per syllable
+        followers = {}
+        def legal_next(pair, index):
+            if (pair, index) not in followers:
+                followers[(pair, index)] = np.flatnonzero(junctions[pair][index]).tolist()
+            return followers[(pair, index)]
+        
         # Get unique first syllables
         first_syllables = list(syldict[1])
         
@@ -260,7 +135,7 @@ class GreekPseudowordGenerator:
         samples_per_first_syllable = max(1, num_samples // len(first_syllables))
         
         # For each first syllable, create some combinations
-        for first_syl in first_syllables:
+        for first_index, first_syl in enumerate(first_syllables):
             # Create list of syllables with this specific first syllable
             syllable_list = [[first_syl]]
             
@@ -271,8 +146,20 @@ class GreekPseudowordGenerator:
             # Generate some combinations with this first syllable
             for _ in range(samples_per_first_syllable):
                 combination = [first_syl]
-                for pos in range(1, len(syldict)):
-                    combination.append(random.choice(syllable_list[pos]))
+                if junctions is None:
+                    for pos in range(1, len(syldict)):
+                        combination.append(random.choice(syllable_list[pos]))
+                else:
+                    # Only follow legal junctions; drop combinations that hit a dead end
+                    index = first_index
+                    for pos in range(1, len(syldict)):
+                        allowed = legal_next(pos - 1, index)
+                        if not allowed:
+                            break
+                        index = random.choice(allowed)
+                        combination.append(syllable_list[pos][index])
+                    if len(combination) < len(syldict):
+                        continue
                 balanced_samples.append(combination)
                 
         # Shuffle the samples
@@ -286,13 +173,13 @@ class GreekPseudowordGenerator:
             status_callback(f"Analyzing {num_syllables}-syllable words for part of speech: {postype}...")
         
         # Filter words by part of speech and frequency
-        filtered_df = self.lexicons["greeklex"][
+        selected = (
             (self.lexicons["greeklex"].Pos == postype) & 
             (self.lexicons["greeklex"].zipfFreq > freq_threshold)
-        ]
+        ).to_numpy()
         
-        # Extract Word column as a Series
-        df = filtered_df["Word"]
+        # Words are syllabified once per lexicon, not once per call
+        syllabified = self.syllabified_lexicon()
         
         # Create syllable dictionary
         syldict = dict()
@@ -300,16 +187,14 @@ class GreekPseudowordGenerator:
             syldict[n+1] = list()
 
         # Collect syllables from filtered words
-        for wrd in df.values:
-            if isinstance(wrd, str):
-                q = self.remove_oxia(wrd)
-                try:
-                    sl = syllabify(q)
-                    if len(sl) == num_syllables:
-                        for n in range(num_syllables):
-                            syldict[n+1].append(sl[n])
-                except Exception as e:
-                    continue
+        for row in np.flatnonzero(selected):
+            joined = syllabified[row]
+            if not joined:
+                continue
+            sl = joined.split(self.SYLLABLE_SEPARATOR)
+            if len(sl) == num_syllables:
+                for n in range(num_syllables):
+                    syldict[n+1].append(sl[n])
 
         # Get unique syllables
         for k, v in syldict.items():
@@ -332,7 +217,9 @@ class GreekPseudowordGenerator:
     
     def generate_pseudowords_with_syllables(self, syldict, included_last_syllables=None, 
                                            add_stress=False, part_of_speech="All",
-                                           sim_threshold=0.8, max_words=100, status_callback=None):
+                                           sim_threshold=0.8, max_words=100, status_callback=None,
+                                           min_ngram_count=1, positional_ngrams=False,
+                                           max_ngram_order=3, similarity_backend="bitparallel"):
         """Generate pseudowords with specific syllable constraints"""
         # Track the number of words generated
         count = 0
@@ -357,26 +244,37 @@ class GreekPseudowordGenerator:
             if status_callback:
                 status_callback(f"Using {len(syldict[len(syldict)])} selected last syllables")
         
+        # Rule out syllable pairs whose junction can never pass the tests
+        junctions = self.junction_matrices(syldict, min_ngram_count)
+        if status_callback and junctions:
+            legal_pairs = sum(int(m.sum()) for m in junctions)
+            total_pairs = sum(m.size for m in junctions)
+            status_callback(f"{legal_pairs} of {total_pairs} syllable junctions are legal")
+        
         # Try to get balanced samples to ensure variety in first syllables
-        balanced_samples = self.get_balanced_syllable_samples(syldict, max_words * 5)
+        balanced_samples = self.get_balanced_syllable_samples(syldict, max_words * 5, junctions)
         
         if balanced_samples:
             # Use balanced samples for better variety
             if status_callback:
                 status_callback("Using balanced sampling to ensure variety in first syllables...")
             
-            # Test the balanced samples
-            for combination in balanced_samples:
+            # Test the balanced samples; the n-gram test runs on whole batches first
+            candidates = (''.join(combination) for combination in balanced_samples)
+            for joined_string, ngrams_ok in self.screen_ngrams(candidates, min_ngram_count, positional_ngrams):
                 attempts += 1
                 if count >= max_words or attempts >= max_attempts:
                     break
-                    
-                joined_string = ''.join(combination)
                 
-                if self.accept_reject_tests(joined_string, sim_threshold):
+                if ngrams_ok and self.accept_reject_tests(joined_string, sim_threshold, check_ngrams=False,
+                                                          max_ngram_order=max_ngram_order,
+                                                          similarity_backend=similarity_backend):
                     # Apply stress if requested
                     if add_stress:
                         joined_string = add_random_stress(joined_string, part_of_speech)
+                        # The stressed form must not be an attested accented word
+                        if self.is_attested(joined_string, "nfc"):
+                            continue
                     
                     accepted_words.append(joined_string)
                     count += 1
@@ -388,19 +286,22 @@ class GreekPseudowordGenerator:
             if status_callback:
                 status_callback("Using standard sampling method...")
                 
-            # Standard method using itertools
-            iterlist = [list(v) for v in syldict.values()]
-            for entry in itertools.product(*iterlist):
+            # Standard method: every combination in order, legal junctions only
+            candidates = (''.join(entry) for entry in self.legal_combinations(syldict, junctions))
+            for joined_string, ngrams_ok in self.screen_ngrams(candidates, min_ngram_count, positional_ngrams):
                 attempts += 1
                 if count >= max_words or attempts >= max_attempts:
                     break
-                    
-                joined_string = ''.join(entry)
                 
-                if self.accept_reject_tests(joined_string, sim_threshold):
+                if ngrams_ok and self.accept_reject_tests(joined_string, sim_threshold, check_ngrams=False,
+                                                          max_ngram_order=max_ngram_order,
+                                                          similarity_backend=similarity_backend):
                     # Apply stress if requested
                     if add_stress:
                         joined_string = add_random_stress(joined_string, part_of_speech)
+                        # The stressed form must not be an attested accented word
+                        if self.is_attested(joined_string, "nfc"):
+                            continue
                     
                     accepted_words.append(joined_string)
                     count += 1
@@ -415,7 +316,8 @@ class GreekPseudowordGenerator:
     
     def generate_pseudowords(self, postype="noun", num_syllables=3, freq_threshold=5, sim_threshold=0.8, 
                             max_words=100, included_last_syllables=None, add_stress=False,
-                            status_callback=None):
+                            status_callback=None, min_ngram_count=1, positional_ngrams=False,
+                            max_ngram_order=3, similarity_backend="bitparallel"):
         """Generate pseudowords"""
         # Send status update
         if status_callback:
@@ -449,7 +351,11 @@ class GreekPseudowordGenerator:
                     part_of_speech=pos,
                     sim_threshold=sim_threshold,
                     max_words=words_per_type,
-                    status_callback=status_callback
+                    status_callback=status_callback,
+                    min_ngram_count=min_ngram_count,
+                    positional_ngrams=positional_ngrams,
+                    max_ngram_order=max_ngram_order,
+                    similarity_backend=similarity_backend
                 )
                 generated_words.extend(pos_words)
                 if status_callback:
@@ -474,7 +380,11 @@ class GreekPseudowordGenerator:
                 part_of_speech=postype,
                 sim_threshold=sim_threshold,
                 max_words=max_words,
-                status_callback=status_callback
+                status_callback=status_callback,
+                min_ngram_count=min_ngram_count,
+                positional_ngrams=positional_ngrams,
+                max_ngram_order=max_ngram_order,
+                similarity_backend=similarity_backend
             )
 
 # Simple command line usage
@@ -485,8 +395,10 @@ if __name__ == "__main__":
     print("=========================")
     
     # Check for lexicon files
-    greeklex_path = os.path.join('data', 'GreekLex2.xlsx')
-    all_num_clean_path = os.path.join('data', 'all_num_clean_ns.xls')
+    # Pre-converted Parquet/TSV/word-list copies are preferred over the Excel files
+    # unless they are older than them
+    greeklex_path = lexicon_sources.find_source('data', 'GreekLex2', '.xlsx', report=True)
+    all_num_clean_path = lexicon_sources.find_source('data', 'all_num_clean_ns', '.xls', report=True)
     
     if not os.path.exists('data'):
         os.makedirs('data')
@@ -0,0 +1,59 @@
+import itertools
+
+import pytest
+
+from lexicon_artifacts import DerivedArtifacts
+from lexicon_loader import LexiconLoader
+
+
+class Generator(LexiconLoader, DerivedArtifacts):
+    # The builders under test need no syllabifier or accent handling
+    remove_oxia = staticmethod(lambda s: s)
+    syllabify = None
+
+
+@pytest.fixture(scope="module")
+def generator(tmp_path_factory):
+    data = tmp_path_factory.mktemp("data")
+    primary = data / "primary.tsv"
+    primary.write_text("Word\tPos\tzipfFreq\n"
+                       "kalos\tadj\t4.0\nlogos\tnoun\t5.0\nmelos\tnoun\t3.0\n"
+                       "salata\tnoun\t3.5\ntalos\tnoun\t2.0\n", encoding="utf-8")
+    secondary = data / "secondary.txt"
+    secondary.write_text("kalamos\nlatos\nmolos\ntomata\nsalos\n", encoding="utf-8")
+    generator = Generator()
+    generator.load_lexicons(str(primary), str(secondary), cache_dir=None, lean=True)
+    return generator
+
+
+def fails_tests_2_or_4(generator, word, min_count):
+    return (generator.max_consecutively_repeated_letters(word) > 1
+            or not generator.search_ngrams_in_lexicon(*generator.generate_ngrams(word), min_count))
+
+
+@pytest.mark.parametrize("min_count", [1, 2])
+def test_legal_combinations_prune_only_failing_words(generator, min_count):
+    syldict = {1: ["ka", "lo", "sa", "me", "t"], 2: ["la", "lo", "ma", "go", "a"], 3: ["s", "tos", "mos", "ta"]}
+    junctions = generator.junction_matrices(syldict, min_count)
+    kept = list(generator.legal_combinations(syldict, junctions))
+    product = list(itertools.product(*syldict.values()))
+    # The kept combinations come in itertools.product order
+    assert [tuple(c) for c in kept] == [c for c in product if list(c) in kept]
+    skipped = [c for c in product if list(c) not in kept]
+    assert kept and skipped
+    for combination in skipped:
+        assert fails_tests_2_or_4(generator, "".join(combination), min_count), combination
+
+
+def test_junctions_reject_doubled_letters(generator):
+    syldict = {1: ["la", "ka"], 2: ["al", "os"]}
+    kept = list(generator.legal_combinations(syldict, generator.junction_matrices(syldict)))
+    assert ["la", "al"] not in kept and ["ka", "al"] not in kept
+
+
+def test_accept_reject_tests_follow_the_lexicon(generator):
+    # Attested words are rejected, and so are unattested bigrams
+    assert not generator.accept_reject_tests("logos", 0.5)
+    assert not generator.accept_reject_tests("xyzw", 0.0)
+    assert generator.search_ngrams_in_lexicon(*generator.generate_ngrams("kalata"))
+    assert generator.accept_reject_tests("kalata", 1.0)
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+
+import lexicon_cache
+from lexicon_cache import ArtifactStore, cached_fingerprint, save_columns, source_fingerprint
+
+
+def write_source(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+
+def test_touched_source_keeps_cache_entry(tmp_path):
+    source = write_source(tmp_path / "words.tsv", "Word\nalpha\nbeta\n")
+    cache = str(tmp_path / "cache")
+    fingerprint = save_columns(cache, [source], {"Word": ["alpha", "beta"]})
+    bump_mtime(source)
+    assert cached_fingerprint(cache, [source]) == fingerprint
+    # The new mtime is recorded, so the next check skips the content hash
+    recorded = lexicon_cache._read_json(os.path.join(cache, lexicon_cache.SOURCES_FILE))
+    assert recorded["sources"][0]["mtime"] == os.stat(source).st_mtime
+
+
+def test_changed_source_invalidates_cache_entry(tmp_path):
+    source = write_source(tmp_path / "words.tsv", "Word\nalpha\nbeta\n")
+    cache = str(tmp_path / "cache")
+    old = save_columns(cache, [source], {"Word": ["alpha", "beta"]})
+    # Same size, different content
+    write_source(tmp_path / "words.tsv", "Word\nalpha\nbetb\n")
+    bump_mtime(source)
+    assert cached_fingerprint(cache, [source]) is None
+    new = save_columns(cache, [source], {"Word": ["alpha", "betb"]})
+    assert new != old and new == source_fingerprint([source])[0]
+    assert cached_fingerprint(cache, [source]) == new
+    # The entry of the old content is pruned
+    assert not os.path.exists(os.path.join(cache, old))
+
+
+def test_missing_or_extra_source_misses_cache(tmp_path):
+    first = write_source(tmp_path / "first.tsv", "Word\nalpha\n")
+    second = write_source(tmp_path / "second.txt", "beta\n")
+    cache = str(tmp_path / "cache")
+    save_columns(cache, [first, second], {"Word": ["alpha"]})
+    assert cached_fingerprint(cache, [first]) is None
+    os.remove(second)
+    assert cached_fingerprint(cache, [first, second]) is None
+
+
+def test_artifact_store_prunes_other_versions(tmp_path):
+    store = ArtifactStore(str(tmp_path), "entry")
+    store.save("ngrams", 1, {"types": np.arange(3, dtype=np.int32)})
+    store.save("phonetic", 1, {"phonetic": ["a", "b"]})
+    store.save("ngrams", 2, {"types": np.arange(4, dtype=np.int32)})
+    assert store.load("ngrams", 1) is None
+    assert not os.path.exists(os.path.join(store.root, "ngrams-v1"))
+    assert store.load("ngrams", 2)["types"].tolist() == [0, 1, 2, 3]
+    # Other artifacts keep their versions
+    assert list(store.load("phonetic", 1)["phonetic"]) == ["a", "b"]
+
+
+def test_artifact_store_ignores_other_fingerprint(tmp_path):
+    ArtifactStore(str(tmp_path), "entry").save("ngrams", 1, {"types": np.arange(3, dtype=np.int32)})
+    stale = ArtifactStore(str(tmp_path), "other")
+    stale.root = ArtifactStore(str(tmp_path), "entry").root
+    assert stale.load("ngrams", 1) is None
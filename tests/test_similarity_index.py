@@ -0,0 +1,133 @@
+import random
+from collections import Counter
+
+import jellyfish
+import numpy as np
+import pytest
+
+from similarity_index import (BitParallelIndex, BKTree, DeletionIndex, EncodedLexicon, LexiconTrie,
+                              QGramIndex, SimilarityIndex, SymSpellIndex, TrieIndex,
+                              banded_distances, bit_parallel_distances, similarity)
+
+THRESHOLDS = (0.0, 0.5, 0.6, 2 / 3, 0.75, 0.8, 0.9)
+
+
+def random_words(rng, count, letters="abcd", shortest=1, longest=9):
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(shortest, longest))) for _ in range(count)]
+
+
+def mutate(rng, word, letters="abcde"):
+    # A few random edits, so queries land near lexicon words as well as far from them
+    word = list(word)
+    for _ in range(rng.randint(0, 3)):
+        edit = rng.choice("ids") if word else "i"
+        at = rng.randint(0, len(word) - (edit != "i"))
+        if edit == "i":
+            word.insert(at, rng.choice(letters))
+        elif edit == "d":
+            del word[at]
+        else:
+            word[at] = rng.choice(letters)
+    # The indexes are never asked about empty words
+    return "".join(word) or rng.choice(letters)
+
+
+def phonetic_string(word):
+    return word.replace("b", "a").replace("dd", "d")
+
+
+def padded_qgrams(word):
+    padded = "\0" * (QGramIndex.Q - 1) + word + "\0" * (QGramIndex.Q - 1)
+    return Counter(padded[i:i + QGramIndex.Q] for i in range(len(padded) - QGramIndex.Q + 1))
+
+
+def lexicon_rows(lexicon):
+    return [lexicon.decode(row) for _, _, block in lexicon.buckets() for row in block]
+
+
+def test_bit_parallel_distances_match_jellyfish():
+    rng = random.Random(0)
+    lexicon = EncodedLexicon.from_words(random_words(rng, 150, longest=12))
+    patterns = random_words(rng, 20, letters="abcde", longest=12)
+    peq = lexicon.pattern_masks(patterns)
+    lengths = np.array([len(p) for p in patterns], dtype=np.int64)
+    for _, _, block in lexicon.buckets():
+        distances = bit_parallel_distances(peq, lengths, block)
+        for b, pattern in enumerate(patterns):
+            for r, row in enumerate(block):
+                assert distances[b, r] == jellyfish.levenshtein_distance(pattern, lexicon.decode(row))
+
+
+def test_banded_distances_match_jellyfish():
+    rng = random.Random(1)
+    lexicon = EncodedLexicon.from_words(random_words(rng, 150, longest=10))
+    for _ in range(40):
+        pattern = mutate(rng, rng.choice(lexicon_rows(lexicon)))
+        codes = lexicon.encode(pattern)
+        for budget in range(4):
+            for _, _, block in lexicon.buckets():
+                distances = banded_distances(codes, block, budget)
+                for r, row in enumerate(block):
+                    expected = jellyfish.levenshtein_distance(pattern, lexicon.decode(row))
+                    assert distances[r] == min(expected, budget + 1)
+
+
+def test_qgram_shared_counts_match_naive_count():
+    rng = random.Random(2)
+    lexicon = EncodedLexicon.from_words(random_words(rng, 120))
+    index = QGramIndex.from_lexicon(lexicon)
+    words = lexicon_rows(lexicon)
+    for _ in range(60):
+        pattern = mutate(rng, rng.choice(words))
+        shared = index.shared_counts(lexicon.encode(pattern))
+        grams = padded_qgrams(pattern)
+        for word_id, word in enumerate(words):
+            assert shared[word_id] == sum((grams & padded_qgrams(word)).values())
+            # The count lemma never filters out a word within the radius
+            distance = jellyfish.levenshtein_distance(pattern, word)
+            assert shared[word_id] >= QGramIndex.min_shared(len(pattern), len(word), distance)
+
+
+def test_lexicon_trie_matches_naive_scan():
+    rng = random.Random(3)
+    words = random_words(rng, 150)
+    trie = LexiconTrie.from_words(words)
+    for _ in range(80):
+        pattern = mutate(rng, rng.choice(words))
+        for threshold in THRESHOLDS:
+            expected = any(similarity(pattern, w) > threshold for w in words)
+            assert trie.any_similar(pattern, threshold) == expected
+
+
+def bit_parallel_index(words, forms):
+    orthographic = EncodedLexicon.from_words(words)
+    phonetic = EncodedLexicon.from_words(forms)
+    qgrams = (QGramIndex.from_lexicon(orthographic), QGramIndex.from_lexicon(phonetic))
+    return BitParallelIndex(orthographic, phonetic, phonetic_string, qgrams)
+
+
+BACKENDS = {
+    "bitparallel": bit_parallel_index,
+    "bktree": lambda words, forms: SimilarityIndex(
+        BKTree.from_words(words), BKTree.from_words(forms), phonetic_string),
+    "symspell": lambda words, forms: SymSpellIndex(
+        DeletionIndex.from_words(words, 1), DeletionIndex.from_words(forms, 1), phonetic_string,
+        bit_parallel_index(words, forms)),
+    "trie": lambda words, forms: TrieIndex(
+        LexiconTrie.from_words(words), LexiconTrie.from_words(forms), phonetic_string),
+}
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_any_similar_matches_naive_scan(backend):
+    rng = random.Random(4)
+    words = random_words(rng, 150, longest=10)
+    forms = [phonetic_string(w) for w in words]
+    index = BACKENDS[backend](words, forms)
+    for _ in range(80):
+        word = mutate(rng, rng.choice(words))
+        for threshold in THRESHOLDS:
+            expected = (any(similarity(word, w) > threshold for w in words)
+                        or any(similarity(phonetic_string(word), f) > threshold for f in forms))
+            assert index.any_similar(word, threshold) == expected, (word, threshold)
+            assert index.any_similar(word, threshold, phonetic_string(word)) == expected, (word, threshold)
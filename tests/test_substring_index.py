@@ -0,0 +1,46 @@
+import random
+
+from substring_index import SubstringIndex
+
+
+def naive_attested(words, word, order):
+    # Every substring of word of at most order letters occurs in some word
+    return all(
+        any(word[i:j] in w for w in words)
+        for i in range(len(word))
+        for j in range(i + 1, min(i + order, len(word)) + 1)
+    )
+
+
+def test_short_word_needs_whole_word_attested():
+    index = SubstringIndex.from_words(["abcx", "xbcd"])
+    assert not index.all_attested("abcd", 4)
+    assert not index.all_attested("abcd", 5)
+    assert index.all_attested("abcd", 3)
+    assert index.all_attested("abc", 5)
+
+
+def test_contains_matches_naive_scan():
+    rng = random.Random(0)
+    words = ["".join(rng.choice("abcd") for _ in range(rng.randint(1, 8))) for _ in range(200)]
+    index = SubstringIndex.from_words(words)
+    for _ in range(500):
+        query = "".join(rng.choice("abcde") for _ in range(rng.randint(1, 6)))
+        assert (query in index) == any(query in w for w in words)
+
+
+def test_all_attested_matches_naive_scan():
+    rng = random.Random(1)
+    words = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 7))) for _ in range(60)]
+    index = SubstringIndex.from_words(words)
+    for _ in range(300):
+        word = "".join(rng.choice("abcd") for _ in range(rng.randint(1, 9)))
+        for order in range(1, 8):
+            assert index.all_attested(word, order) == naive_attested(words, word, order)
+
+
+def test_columns_round_trip():
+    words = ["καλος", "καλη", "λογος"]
+    index = SubstringIndex.from_words(words)
+    restored = SubstringIndex.from_columns(index.columns())
+    assert "καλ" in restored and "γος" in restored and "ξ" not in restored